@@ -7,6 +7,7 @@ import dns.zone
 import dns.rdataclass
 import dns.tsig
 from dns.exception import DNSException
+from cerberus.utils import stats
 
 
 class DNSService(object):
@@ -47,12 +48,28 @@ class DNSService(object):
         data.delete(name, rtype)
         return self.handler(data)
 
+    def remove_records(self, records):
+        """
+            Remove many records with a single update message
+            :param records: List of record (dict with name and rtype)
+        """
+        data = dns.update.Update(self.zone, keyring=self.keyring)
+        for record in records:
+            rtype = record.get("rtype")
+            if rtype:
+                data.delete(record.get("name"), self.validate_rtype(rtype))
+            else:
+                data.delete(record.get("name"))
+        return self.handler(data)
+
     def import_records(self):
-        answer = dns.resolver.query(self.zone, "NS")
+        with stats.recorder.measure("dns", f"NS {self.zone}"):
+            answer = dns.resolver.query(self.zone, "NS")
         for rdata in answer:
             try:
                 ns = str(rdata)
-                dns_zone = dns.zone.from_xfr(dns.query.xfr(ns, self.zone))
+                with stats.recorder.measure("dns", f"AXFR {self.zone}"):
+                    dns_zone = dns.zone.from_xfr(dns.query.xfr(ns, self.zone))
             except DNSException as exc:
                 exc = DNSException(f"{str(exc)} ({self.zone})")
                 raise exc
@@ -86,7 +103,8 @@ class DNSService(object):
     def handler(self, data):
         err = True
         try:
-            result = dns.query.tcp(data, self.nameserver, timeout=self.timeout)
+            with stats.recorder.measure("dns", f"UPDATE {self.zone}"):
+                result = dns.query.tcp(data, self.nameserver, timeout=self.timeout)
             self.process_result = str(result)
             response = str(result).split("\n")[2].split(" ")[1]
             err = False
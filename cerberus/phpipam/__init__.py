@@ -1,8 +1,43 @@
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from cerberus.utils import stats
 from . import errors
 
-def make_request(method, url, headers={}, params={}, payload={}, timeout=30):
+def make_session(pool_size=10, retries=3):
+    """
+        Keep-alive HTTP session, the connections are pooled (pool_size for each host)
+        and reused by every request of the session. The failed connections are retried
+        with backoff, the read errors and the gateway errors are only retried for
+        the idempotent requests, so POST (address reservation) is never sent twice
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def error_message(response):
+    """
+        :return: The error message from phpIPAM (e.g. "Token expired"), or empty string
+        :rtype: str
+    """
+    try:
+        return str(response.json().get("message") or "")
+    except (ValueError, AttributeError):
+        return ""
+
+def make_request(method, url, headers={}, params={}, payload={}, timeout=30, session=None):
     method = str.upper(method)
     kwargs = {
         "url": url,
@@ -12,27 +47,22 @@ def make_request(method, url, headers={}, params={}, payload={}, timeout=30):
         "timeout": timeout
     }
 
+    # Without a session, each request open a new connection
+    session = session or requests
+
     try:
-        if method == "GET":
-            response = requests.get(**kwargs)
-        elif method == "POST":
-            response = requests.post(**kwargs)
-        elif method == "PATCH":
-            response = requests.patch(**kwargs)
-        elif method == "PUT":
-            response = requests.put(**kwargs)
-        elif method == "DELETE":
-            response = requests.delete(**kwargs)
-        response.raise_for_status()
-
-    except (requests.ConnectionError, requests.Timeout) as e:
+        with stats.recorder.measure("phpipam", f"{method} {stats.endpoint(url)}"):
+            response = session.request(method, **kwargs)
+            response.raise_for_status()
+
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.RetryError) as e:
         err = errors.ServiceUnavailable(f"Timeout reached or may phpIPAM service had internal error: {str(e)}")
         raise err
 
     except requests.exceptions.HTTPError as e:
 
         if e.response.status_code != 500:
-            raise errors.HttpError(str(e))
+            raise errors.HttpError(str(e), status_code=e.response.status_code, reason=error_message(e.response))
 
         err = errors.ServiceUnavailable(f"phpIPAM service had internal error: {str(e)}")
         raise err
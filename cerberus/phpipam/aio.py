@@ -0,0 +1,85 @@
+import weakref
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncPHPIPAMService(object):
+    """ asyncio phpIPAM Service Class
+
+    This class mirror the PHPIPAMService methods as coroutines, so dozens of phpIPAM calls
+    could be fanned out concurrently (asyncio.gather) instead of adding up their latencies.
+    The calls are run by the PHPIPAMService on a thread pool, so they share its keep-alive
+    session (connection pool) and its token, and the number of in-flight calls is bounded.
+
+    >>  Note: requests is not asyncio native, so the thread pool is sized to the concurrency,
+              and the concurrency should not exceed the connection pool size of the service.
+    """
+
+    def __init__(self, service, concurrency=10):
+        """
+            Constructor
+
+            :param service: PHPIPAMService
+            :param concurrency: Maximum number of in-flight calls
+        """
+        self.service = service
+        self.concurrency = max(1, concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    def semaphore(self, loop):
+        # asyncio.Semaphore is bound to the event loop (created inside the running loop)
+        if loop not in self.semaphores:
+            self.semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self.semaphores[loop]
+
+    async def call(self, method, *args, **kwargs):
+        """
+            Run the PHPIPAMService method on the thread pool
+        """
+        loop = asyncio.get_event_loop()
+        async with self.semaphore(loop):
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(getattr(self.service, method), *args, **kwargs)
+            )
+
+    async def show_ipaddr(self, *args, **kwargs):
+        return await self.call("show_ipaddr", *args, **kwargs)
+
+    async def show_subnet(self, *args, **kwargs):
+        return await self.call("show_subnet", *args, **kwargs)
+
+    async def reserve_ipaddr(self, *args, **kwargs):
+        return await self.call("reserve_ipaddr", *args, **kwargs)
+
+    async def release_ipaddr(self, *args, **kwargs):
+        return await self.call("release_ipaddr", *args, **kwargs)
+
+    async def add_ipaddr(self, *args, **kwargs):
+        return await self.call("add_ipaddr", *args, **kwargs)
+
+    async def update_ipaddr(self, *args, **kwargs):
+        return await self.call("update_ipaddr", *args, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+def run(coro):
+    """
+        Run the coroutine on a new event loop (same like asyncio.run() on Python 3.7+)
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+async def gather(*coros, return_exceptions=False):
+    """
+        asyncio.gather() inside the running loop, so it could be passed to run()
+        >>> run(gather(service.show_subnet(1), service.show_subnet(2)))
+    """
+    return await asyncio.gather(*coros, return_exceptions=return_exceptions)
@@ -1,9 +1,14 @@
 
-import requests
+import time
+import random
 import base64
+import requests
+import ipaddress
+import threading
 
 from . import (
     make_request,
+    make_session,
     errors
 )
 from cerberus.utils import parser
@@ -11,15 +16,64 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of addresses of a subnet which are planned by reserve_ipaddrs() (a /16)
+MAX_SCAN = 65536
+
+def token_rejected(exc):
+    """
+        The token is rejected by phpIPAM (expired or revoked), phpIPAM also answer 403
+        for the request which is not permitted to the user, so 403 is only the token
+        when its message said so
+    """
+    if exc.status_code == 401:
+        return True
+    return exc.status_code == 403 and "token" in exc.reason.lower()
+
+def address_exists(exc):
+    """
+        The address is already created, phpIPAM answer 409 or 400 with the message
+        (e.g. "IP address 10.0.0.10 already exists")
+    """
+    if exc.status_code == 409:
+        return True
+    return exc.status_code == 400 and "exist" in exc.reason.lower()
+
 class PHPIPAMService(object):
 
-    def __init__(self, app_id, endpoint, user, pwd, retries=3):
+    def __init__(self, app_id, endpoint, user, pwd, retries=3, pool_size=10, token_store=None, subnet_cache=None):
         self.endpoint = endpoint[:-1] if endpoint.endswith("/") else endpoint
         self.app_id = app_id
         self.user = user
         self.pwd = pwd
         self.retries = retries
+        self.session = make_session(pool_size=pool_size, retries=retries)
+        self.token_store = token_store
+        self.subnet_cache = subnet_cache
+        self.subnet_lock = threading.Lock()
+        self.token = self._get_token()
+
+    def request(self, method, url, **kwargs):
+        """
+            make_request() with the keep-alive session of the service,
+            the request is sent again with a new token if the token is rejected
+            (401, or 403 which message is about the token)
+        """
+        headers = kwargs.get("headers") or {}
+        try:
+            return make_request(method, url=url, session=self.session, **kwargs)
+        except errors.HttpError as exc:
+            if "token" not in headers or not token_rejected(exc):
+                raise exc
+
+        # The token is expired or revoked before its expiry
+        if self.token_store:
+            self.token_store.clear()
         self.token = self._set_token()
+        kwargs["headers"] = dict(headers, token=self.token)
+        return make_request(method, url=url, session=self.session, **kwargs)
+
+    def close(self):
+        self.session.close()
     
     @property
     def authorization(self):
@@ -30,20 +84,26 @@ class PHPIPAMService(object):
     def base_url(self):
         return f"{self.endpoint}/api/{self.app_id}"
 
+    def _get_token(self):
+        token = self.token_store.load() if self.token_store else None
+        return token or self._set_token()
+
     def _set_token(self):
         url = f"{self.base_url}/user/"
         headers = {
             "Content-Type" : "application/json",
             "Authorization" : f"Basic {self.authorization}"
         }
-        response = make_request("POST", url=url, headers=headers)
+        response = self.request("POST", url=url, headers=headers)
+        if self.token_store:
+            self.token_store.save(response["data"]["token"], response["data"].get("expires"))
         return response["data"]["token"]
     
     def check_free_ipaddr(self, subnet_id=None, subnet_cidr=None):
         subnet_id = self.check_subnet(cidr=subnet_cidr, subnet_id=subnet_id)
         url = f"{self.base_url}/addresses/first_free/{subnet_id}/"
 
-        response = make_request(
+        response = self.request(
             "GET", 
             url=url, 
             headers=dict(token=self.token)
@@ -59,27 +119,122 @@ class PHPIPAMService(object):
 
         url = f"{self.base_url}/addresses/first_free/{subnet_id}/"
 
+        # The concurrent reservations could race for the same address,
+        # so the reservation is retried with backoff (and jitter)
         retry = 0
-        while retry < self.retries:
+        while True:
             try:
-                response = make_request(
+                response = self.request(
                     "POST", 
                     url=url, 
                     headers=dict(token=self.token)
                 )
-            except:
-                retry+=1
+            except errors.Error as exc:
+                retry += 1
+                if retry >= self.retries:
+                    raise exc
+                time.sleep(random.uniform(0, 0.5 * 2 ** retry))
             else:
                 break
 
         return parser.JSONParser("IPReserveResponse", response)
+
+    def list_ipaddrs(self, subnet_id=None, subnet_cidr=None):
+        """
+            :return: List of the address records of the subnet
+            :rtype: list
+        """
+        subnet_id = self.check_subnet(cidr=subnet_cidr, subnet_id=subnet_id)
+        url = f"{self.base_url}/subnets/{subnet_id}/addresses/"
+
+        try:
+            response = self.request(
+                "GET",
+                url=url,
+                headers=dict(token=self.token)
+            )
+        except errors.HttpError as exc:
+            # phpIPAM answer the subnet without any address with 404
+            if exc.status_code != 404:
+                raise exc
+            return []
+        return response.get("data") or []
+
+    def reserve_ipaddrs(self, count, subnet_id=None, subnet_cidr=None, payload={}):
+        """
+            Reserve many addresses of the subnet in a single pass.
+            The free addresses are planned from the address list of the subnet (free-address bitmap),
+            then each address is confirmed with a create, the address which is already taken
+            (created by another client meanwhile) is skipped.
+            Only IPv4 subnet is supported, and only the first MAX_SCAN addresses of the subnet are planned
+
+            :param count: Number of addresses
+            :param payload: Additional fields of the address (description, hostname, etc)
+            :return: List of the reserved address
+            :rtype: list
+        """
+        subnet_id = self.check_subnet(cidr=subnet_cidr, subnet_id=subnet_id)
+        subnet = self.show_subnet(subnet_id=subnet_id)
+        network = ipaddress.ip_network(f"{subnet.subnet}/{subnet.mask}", strict=False)
+        if network.version != 4:
+            err = errors.Error(f"Subnet ({subnet.subnet}/{subnet.mask}) is not IPv4, unable to reserve {count} addresses at once")
+            raise err
+
+        # One byte for each address of the subnet (up to MAX_SCAN), 1 is taken
+        taken = bytearray(min(network.num_addresses, MAX_SCAN))
+        if network.num_addresses > 2:
+            taken[0] = 1
+            if len(taken) == network.num_addresses:
+                taken[-1] = 1
+
+        start = int(network.network_address)
+        for record in self.list_ipaddrs(subnet_id=subnet_id):
+            try:
+                index = int(ipaddress.ip_address(record.get("ip"))) - start
+            except ValueError:
+                continue
+            if 0 <= index < len(taken):
+                taken[index] = 1
+
+        reserved = []
+        index = taken.find(0)
+        while index != -1 and len(reserved) < count:
+            address = str(ipaddress.ip_address(start + index))
+            try:
+                self.request(
+                    "POST",
+                    url=f"{self.base_url}/addresses/",
+                    headers=dict(token=self.token),
+                    payload=dict(payload, ip=address, subnetId=subnet_id)
+                )
+            except errors.HttpError as exc:
+                # The address is taken after the address list is taken
+                if not address_exists(exc):
+                    self._rollback(reserved, subnet_id)
+                    raise exc
+            else:
+                reserved.append(address)
+            index = taken.find(0, index + 1)
+
+        if len(reserved) < count:
+            self._rollback(reserved, subnet_id)
+            err = errors.NotFound(f"Subnet ({subnet.subnet}/{subnet.mask}) has only {len(reserved)} free addresses, {count} addresses are needed")
+            raise err
+        return reserved
+
+    def _rollback(self, addresses, subnet_id):
+        for address in addresses:
+            try:
+                self.release_ipaddr(address, subnet_id=subnet_id)
+            except errors.Error:
+                logger.warning(f"Unable to release address {address}")
     
     def release_ipaddr(self, address, subnet_id=None, subnet_cidr=None):
         subnet_id = self.check_subnet(cidr=subnet_cidr, subnet_id=subnet_id)        
 
         url = f"{self.base_url}/addresses/{address}/{subnet_id}/"
         
-        response = make_request(
+        response = self.request(
             "DELETE", 
             url=url, 
             headers=dict(token=self.token)
@@ -90,7 +245,7 @@ class PHPIPAMService(object):
         subnet_id = self.check_subnet(cidr=subnet_cidr, subnet_id=subnet_id)
         payload["subnetId"] = subnet_id
         url = f"{self.base_url}/addresses/"
-        response = make_request(
+        response = self.request(
             "POST",
             url=url, 
             headers=dict(token=self.token),
@@ -100,7 +255,7 @@ class PHPIPAMService(object):
         response = parser.JSONParser("IPNewResponse", response)
 
         if show_result:
-            response = make_request(
+            response = self.request(
                 "GET",
                 url=f"{url}{response.id}/",
                 headers=dict(token=self.token)
@@ -115,7 +270,7 @@ class PHPIPAMService(object):
         address = self.show_ipaddr(address=address, subnet_id=subnet_id)
 
         url = f"{self.base_url}/addresses/{address.id}/"
-        response = make_request(
+        response = self.request(
             "PATCH",
             url=url,
             headers=dict(token=self.token),
@@ -123,7 +278,7 @@ class PHPIPAMService(object):
         )
 
         if show_result:
-            response = make_request(
+            response = self.request(
                 "GET",
                 url=url,
                 headers=dict(token=self.token)
@@ -145,7 +300,7 @@ class PHPIPAMService(object):
         else:
             raise ValueError("Address or Hostname are needed!")
         
-        response = make_request(
+        response = self.request(
             "GET",
             url=url, 
             headers=dict(token=self.token)
@@ -160,9 +315,9 @@ class PHPIPAMService(object):
         response = parser.JSONParser("IPInfoResponse", response)
 
         if subnet_id:
-            subnet = self.show_subnet(subnet_id=subnet_id)
             data = list(filter(lambda x: x.subnetId == subnet_id, response.data))
             if not data:
+                subnet = self.show_subnet(subnet_id=subnet_id)
                 if address: msg = f"ipv4 ({address})"
                 elif hostname: msg = f"hostname ({hostname})"
                 msg = f"Address with {msg} in the subnet ({subnet.subnet}/{subnet.mask}) not found!"
@@ -177,10 +332,48 @@ class PHPIPAMService(object):
             raise ValueError("Subnet ID or Subnet CIDR are needed!")
         return subnet_id
 
+    @property
+    def subnets(self):
+        """
+            Subnet cache, the records are reloaded from /subnets/ whenever expired
+            :rtype: SubnetCache
+        """
+        cache = self.subnet_cache
+        if cache is None:
+            return None
+
+        # The threads of the service (e.g. AsyncPHPIPAMService) reload the records once
+        with self.subnet_lock:
+            if not cache.loaded:
+                cache.load()
+            if cache.expired:
+                try:
+                    cache.update(self.list_subnets())
+                except errors.Error as exc:
+                    # Keep the stale records (the missing subnet use the subnet lookup API),
+                    # the records are reloaded again after the TTL
+                    logger.warning(f"Unable to reload the subnets ({exc})")
+                    cache.postpone()
+        return cache
+
+    def list_subnets(self):
+        url = f"{self.base_url}/subnets/"
+        response = self.request(
+            "GET",
+            url=url,
+            headers=dict(token=self.token)
+        )
+        return response.get("data") or []
+
     def find_subnet(self, cidr):
+        subnets = self.subnets
+        record = subnets.get(cidr=cidr) if subnets else None
+        if record:
+            return record["id"]
+
         url = f"{self.base_url}/subnets/cidr/{cidr}/"
 
-        response = make_request(
+        response = self.request(
             "GET", 
             url=url, 
             headers=dict(token=self.token)
@@ -193,10 +386,18 @@ class PHPIPAMService(object):
         subnet_id = response.data[0].id
         return subnet_id
 
-    def show_subnet(self, subnet_id=None, cidr=None):
+    def show_subnet(self, subnet_id=None, cidr=None, cached=True):
+        """
+            :param cached: If False, the subnet is taken from /subnets/{id}/ (with the subnet calculation)
+        """
         subnet_id = self.check_subnet(cidr=cidr, subnet_id=subnet_id)
+        subnets = self.subnets if cached else None
+        record = subnets.get(subnet_id=subnet_id) if subnets else None
+        if record:
+            return parser.JSONParser("SubnetInfoData", record)
+
         url = f"{self.base_url}/subnets/{subnet_id}/"
-        response = make_request(
+        response = self.request(
             "GET", 
             url=url, 
             headers=dict(token=self.token)
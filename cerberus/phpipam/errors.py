@@ -8,4 +8,8 @@ class NotFound(Error):
     pass
 
 class HttpError(Error):
-    pass
\ No newline at end of file
+
+    def __init__(self, message, status_code=None, reason=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason or ""
\ No newline at end of file
@@ -0,0 +1,107 @@
+import time
+import copy
+import ipaddress
+import threading
+from cerberus.utils import storage
+
+class SubnetCache(object):
+    """ phpIPAM Subnet Cache Class
+
+    This class keep the subnet records of phpIPAM (loaded in bulk from /subnets/),
+    so the subnet lookup by id or by CIDR are answered locally. The records are saved
+    on disk (owner-only permission) and shared by the other processes on the host
+    until the TTL is reached.
+    """
+
+    def __init__(self, endpoint, app_id, ttl=300, cache_dir=None):
+        """
+            Constructor
+
+            :param endpoint: phpIPAM endpoint
+            :param app_id: phpIPAM App Identifier
+            :param ttl: Maximum age of the records (seconds)
+            :param cache_dir: Cache directory (default: ~/.cerberus)
+        """
+        self.ttl = ttl
+        self.path = storage.cache_path(
+            "subnets",
+            f"{storage.safe_name(endpoint, app_id)}.json",
+            cache_dir=cache_dir
+        )
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.fetched = 0
+        self.by_id = {}
+        self.by_cidr = {}
+
+    @property
+    def expired(self):
+        return time.time() - self.fetched >= self.ttl
+
+    def load(self):
+        """
+            Load the records from cache file
+        """
+        data = storage.read_json(self.path) or {}
+        with self.lock:
+            self._build(data.get("records") or [], data.get("fetched") or 0)
+            self.loaded = True
+
+    def update(self, records):
+        """
+            Replace the records with the records from /subnets/ and save them to cache file
+
+            :param records: List of subnet record (dict)
+        """
+        fetched = time.time()
+        with self.lock:
+            self._build(records, fetched)
+            self.loaded = True
+        storage.write_json(self.path, {"fetched": fetched, "records": records})
+
+    def postpone(self):
+        """
+            Keep the current records until the TTL is reached again (the reload is failed),
+            the cache file is not touched so the other processes still reload the records
+        """
+        with self.lock:
+            self.fetched = time.time()
+
+    def clear(self):
+        with self.lock:
+            self._build([], 0)
+        storage.remove(self.path)
+
+    def get(self, subnet_id=None, cidr=None):
+        """
+            Get the subnet record by its id or its exact CIDR
+
+            :return: A copy of subnet record, or None if not found
+            :rtype: dict
+        """
+        if subnet_id is not None:
+            record = self.by_id.get(str(subnet_id))
+        else:
+            try:
+                network = ipaddress.ip_network(cidr, strict=False)
+            except ValueError:
+                return None
+            record = self.by_cidr.get((network.version, int(network.network_address), network.prefixlen))
+        return copy.deepcopy(record)
+
+    def _build(self, records, fetched):
+        by_id = {}
+        by_cidr = {}
+        for record in records:
+            try:
+                network = ipaddress.ip_network(f"{record.get('subnet')}/{record.get('mask')}", strict=False)
+            except ValueError:
+                # Folder or the record without subnet
+                continue
+
+            by_id[str(record.get("id"))] = record
+            by_cidr[(network.version, int(network.network_address), network.prefixlen)] = record
+
+        self.by_id = by_id
+        self.by_cidr = by_cidr
+        self.fetched = fetched
@@ -0,0 +1,77 @@
+import time
+import datetime
+from cerberus.utils import storage
+
+# Lifetime (seconds) of the token whenever the expiry is unknown
+DEFAULT_LIFETIME = 3600
+
+class TokenStore(object):
+    """ phpIPAM Token Store Class
+
+    This class save the phpIPAM API token and its expiry locally (owner-only permission),
+    so the other processes on the host (next invocation, pool workers) could reuse
+    the token instead of login again.
+
+    >>  Note: The expiry from phpIPAM is the server local time, it is assumed
+              to be the same timezone with this host. When the expiry is already passed
+              (the timezones are not the same), the default lifetime is used instead.
+    """
+
+    def __init__(self, endpoint, app_id, user=None, cache_dir=None, margin=300):
+        """
+            Constructor
+
+            :param endpoint: phpIPAM endpoint
+            :param app_id: phpIPAM App Identifier
+            :param user: User credential of the token
+            :param cache_dir: Cache directory (default: ~/.cerberus)
+            :param margin: The token is refreshed when it expires within margin (seconds)
+        """
+        self.margin = margin
+        self.path = storage.cache_path(
+            "tokens",
+            f"{storage.safe_name(user, endpoint, app_id)}.json",
+            cache_dir=cache_dir
+        )
+
+    def load(self):
+        """
+            Load the saved token
+
+            :return: The token, or None if there is no token or it is near expiry
+            :rtype: str
+        """
+        data = storage.read_json(self.path)
+        if not data or not data.get("token"):
+            return None
+
+        if (data.get("expires") or 0) - self.margin <= time.time():
+            return None
+        return data["token"]
+
+    def save(self, token, expires=None):
+        """
+            Save the token and its expiry
+
+            :param token: phpIPAM API token
+            :param expires: Expiry from phpIPAM (e.g. 2019-06-12 10:02:48)
+        """
+        storage.write_json(self.path, {"token": token, "expires": parse_expires(expires)})
+
+    def clear(self):
+        storage.remove(self.path)
+
+def parse_expires(expires):
+    """
+        Parse the expiry from phpIPAM as the local time of this host,
+        the default lifetime is used if the expiry is unknown or already passed
+
+        :return: The expiry as a timestamp
+        :rtype: float
+    """
+    now = time.time()
+    try:
+        timestamp = time.mktime(datetime.datetime.strptime(expires, "%Y-%m-%d %H:%M:%S").timetuple())
+    except (TypeError, ValueError):
+        return now + DEFAULT_LIFETIME
+    return timestamp if timestamp > now else now + DEFAULT_LIFETIME
@@ -1,4 +1,5 @@
 import os
+import re
 import click
 import time
 import subprocess
@@ -105,3 +106,30 @@ class KnifeBootstrap(object):
                 raise err
         else:
             return output
+
+    def delete_many(self, fqdns):
+        """
+            Delete many nodes (and their clients) with a single bulk delete for each
+        """
+        pattern = "^({})$".format("|".join(re.escape(fqdn) for fqdn in fqdns))
+        command = f"knife node bulk delete --yes '{pattern}' && knife client bulk delete --yes '{pattern}'"
+
+        out = subprocess.PIPE
+        if self.debug:
+            out = None
+
+        try:
+            output = subprocess.run(
+                command,
+                stdout=out,
+                stderr=out,
+                shell=True,
+                check=True
+            )
+        except subprocess.CalledProcessError as err:
+            if self.show_err:
+                return err.output
+            else:
+                raise err
+        else:
+            return output
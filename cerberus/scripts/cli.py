@@ -1,9 +1,15 @@
 
 import os
+import json
 import click
+import shutil
+import tempfile
+import functools
 import configparser
 
 from cerberus import __version__
+from cerberus.utils import parser
+from cerberus.utils.stats import recorder
 from .config import ConfigFileProcessor
 from .commands import init_command
 
@@ -18,8 +24,16 @@ from .commands import init_command
     type=click.File(),
     help="Selected configuration file."
 )
+@click.option("--stats",
+    is_flag=True,
+    help="Print the number of calls and latency to vCenter, phpIPAM and DNS at exit."
+)
+@click.option("--stats-json",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the number of calls and latency to vCenter, phpIPAM and DNS as JSON file at exit."
+)
 @click.pass_context
-def cli(ctx, config_file):
+def cli(ctx, config_file, stats, stats_json):
     """ 
     The available commands for execution to Cerberus are listed below.\n
     """
@@ -53,4 +67,37 @@ def cli(ctx, config_file):
     ctx.obj["CONFIG"] = config
     ctx.obj["CONFIG_PATH"] = cfp.config_path
 
+    if stats or stats_json:
+        recorder.enable(tempfile.mkdtemp(prefix="cerberus-stats-"))
+        ctx.call_on_close(functools.partial(report_stats, show=stats, path=stats_json))
+
+def report_stats(show=False, path=None):
+    recorder.collect()
+    shutil.rmtree(recorder.flush_dir, ignore_errors=True)
+    entries = recorder.to_list()
+
+    if path:
+        with open(path, "w") as fileused:
+            json.dump(entries, fileused, indent=4)
+
+    if show:
+        output = parser.BeautifyFormat.from_arr(
+            [
+                [
+                    entry["category"],
+                    entry["name"],
+                    str(entry["count"]),
+                    str(entry["errors"]),
+                    f"{entry['total']:.3f}",
+                    f"{entry['total'] / entry['count'] * 1000:.1f}",
+                    f"{entry['p50'] * 1000:.1f}",
+                    f"{entry['p95'] * 1000:.1f}",
+                    f"{entry['max'] * 1000:.1f}"
+                ] for entry in entries
+            ],
+            headers=["SERVICE", "CALL", "COUNT", "ERRORS", "TOTAL(s)", "AVG(ms)", "P50(ms)", "P95(ms)", "MAX(ms)"]
+        )
+        click.echo("\n==== Stats ====", err=True)
+        click.echo("\n".join(output), err=True)
+
 init_command(cli)
\ No newline at end of file
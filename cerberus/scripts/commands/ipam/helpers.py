@@ -1,16 +1,25 @@
 
 import click
+from cerberus.phpipam import aio
+from cerberus.phpipam.aio import AsyncPHPIPAMService
 from cerberus.utils import parser
 
 def resolve_subnet(service, addresses):
-    result = []
-    
-    if isinstance(addresses, list):
-        for addr in addresses:
-            result.append(service.show_subnet(addr.subnetId))
-    else:
-        result.append(service.show_subnet(addresses.subnetId))
-    return result
+    # The addresses mostly share the same subnet, so each subnet is resolved once,
+    # and the subnets are resolved concurrently
+    addresses = addresses if isinstance(addresses, list) else [addresses]
+    subnet_ids = list(set(addr.subnetId for addr in addresses))
+
+    aservice = AsyncPHPIPAMService(service)
+    try:
+        subnets = aio.run(aio.gather(*[
+            aservice.show_subnet(subnet_id) for subnet_id in subnet_ids
+        ]))
+    finally:
+        aservice.close()
+
+    subnets = dict(zip(subnet_ids, subnets))
+    return [subnets[addr.subnetId] for addr in addresses]
 
 def show_ip(addresses, subnets):
     data = []
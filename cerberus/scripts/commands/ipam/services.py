@@ -1,11 +1,45 @@
 
+from cerberus.phpipam.aio import AsyncPHPIPAMService
 from cerberus.phpipam.core import PHPIPAMService
+from cerberus.phpipam.subnets import SubnetCache
+from cerberus.phpipam.tokens import TokenStore
 
 def init_ipam_service(ipam_obj):
+    token_store = None
+    if ipam_obj.get("token_cache", True):
+        token_store = TokenStore(
+            endpoint=ipam_obj.get("endpoint"),
+            app_id=ipam_obj.get("app_id"),
+            user=ipam_obj.get("user"),
+            cache_dir=ipam_obj.get("cache_dir")
+        )
+
+    subnet_cache = None
+    if ipam_obj.get("subnet_cache_ttl", 300):
+        subnet_cache = SubnetCache(
+            endpoint=ipam_obj.get("endpoint"),
+            app_id=ipam_obj.get("app_id"),
+            ttl=ipam_obj.get("subnet_cache_ttl", 300),
+            cache_dir=ipam_obj.get("cache_dir")
+        )
+
     service = PHPIPAMService(
         app_id=ipam_obj.get("app_id"),
         endpoint=ipam_obj.get("endpoint"),
         user=ipam_obj.get("user"),
-        pwd=ipam_obj.get("pwd")
+        pwd=ipam_obj.get("pwd"),
+        pool_size=ipam_obj.get("pool_size") or 10,
+        token_store=token_store,
+        subnet_cache=subnet_cache
+    )
+    return service
+
+def init_async_ipam_service(ipam_obj, service=None):
+    """
+        :param service: PHPIPAMService to be shared (default: a new service from ipam_obj)
+    """
+    service = service or init_ipam_service(ipam_obj)
+    return AsyncPHPIPAMService(
+        service,
+        concurrency=ipam_obj.get("pool_size") or 10
     )
-    return service
\ No newline at end of file
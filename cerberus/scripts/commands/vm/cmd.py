@@ -22,7 +22,7 @@ from . import (
 @click.option("--vpass", "pwd", type=click.STRING, help="VMWare vSphere password")
 @click.option("--vport", "port", default=443, type=click.INT, help="VMWare vSphere port", show_default=True)
 @click.option("--vssl", "ssl", is_flag=True, help="VMWare vSphere SSL", show_default=True)
-@click.option("--datacenter", type=click.STRING, help="VM vSphere Datacenter", show_default=True)
+@click.option("--datacenter", type=click.STRING, help="VM vSphere Datacenter (identifier on [vcenter.datacenters] section, or \"all\" for every datacenter)", show_default=True)
 @click.pass_context
 def cli(ctx, **parameters):
     required = ("host","port","user","pwd","ssl","datacenter",)
@@ -35,9 +35,14 @@ def cli(ctx, **parameters):
                 param_hint=req
             )
     
+    datacenter = parameters.pop("datacenter", None)
     for k in parameters:
         if parameters[k]:
             vcenter_obj[k] = parameters[k]    
+
+    targets = helpers.resolve_targets(config, datacenter)
+    config["vcenter.targets"] = targets
+    config["vcenter"] = targets[0]
     
 @cli.command("find", help="Find available virtual machine in vCenter Server Appliance")
 @click.argument("vm_name", required=False, nargs=-1)
@@ -48,13 +53,16 @@ def cli(ctx, **parameters):
 @click.pass_context
 def find(ctx, vm_name, ipaddr, hostname, uuid, insecure):
     config = ctx.obj["CONFIG"]
+    # Lookup based search could be shown while the next pages are still arriving
+    stream = bool(vm_name) or (not uuid and insecure)
     parameters = {
         "config": config, 
         "vm_name": vm_name, 
         "ipaddr": ipaddr, 
         "hostname": hostname, 
         "uuid": uuid, 
-        "insecure": insecure
+        "insecure": insecure,
+        "stream": stream
     }
 
     param = vm_name or ipaddr or hostname or uuid
@@ -71,18 +79,27 @@ def find(ctx, vm_name, ipaddr, hostname, uuid, insecure):
             if progress is not None: 
                 result = progress
                 break
+
+    datacenter = len(config["vcenter.targets"]) > 1
+    if stream and not helpers.show_vm_stream(result, datacenter=datacenter):
+        click.echo(f"No virtual machine are found")
+        ctx.exit(1)
+    elif stream:
+        return
+
     if not result:
         click.echo(f"No virtual machine are found")
         ctx.exit(1)
-    helpers.show_vm(result)
+    helpers.show_vm(result, datacenter=datacenter)
 
-@cli.command("start", help="Start a virtual machine in vCenter Server Appliance")
+@cli.command("start", help="Start virtual machines in vCenter Server Appliance")
 @click.argument("vm_name", required=False)
 @click.option("--hostname", help="VM hostname")
-@click.option("--uuid", help="VM UUID Instance")
+@click.option("--uuid", callback=callbacks.convert2list, help="VM UUID Instance (comma separated for many virtual machines)")
 @click.option("-i","--insecure-search", "insecure", is_flag=True, help="Insecure Search (mean searching with ignoring vmware-tools)")
+@click.option("-a", "--all", "select_all", is_flag=True, help="Select all the matched virtual machines")
 @click.pass_context
-def start(ctx, vm_name, uuid, hostname, insecure):
+def start(ctx, vm_name, uuid, hostname, insecure, select_all):
     config = ctx.obj["CONFIG"]
     parameters = {
         "config": config, 
@@ -93,6 +110,9 @@ def start(ctx, vm_name, uuid, hostname, insecure):
     }
 
     param = vm_name or hostname or uuid
+    if not param:
+        raise click.ClickException("No argument or option found")
+
     searching = Threading(helpers.searching_vm, **parameters)
     searching_progressbar = click.progressbar(searching.progress, label=f"Searching Virtual Machine ") 
     with searching_progressbar as progressbar:
@@ -104,38 +124,20 @@ def start(ctx, vm_name, uuid, hostname, insecure):
                 result = progress
                 break
 
+    result = list(filter(lambda x: x['runtime.powerState'] == 'poweredOff', helpers.as_records(result)))
     if not result:
-        raise click.ClickException()
+        click.echo(f"No powered off virtual machine are found")
         ctx.exit(1)
 
-    if uuid:
-        vm = result
-    else:
-        result = list(filter(lambda x: x['runtime.powerState'] == 'poweredOff', progress))
-        
-        click.echo(f"==> {len(result)} virtual machines found")
-        for index, vm in enumerate(result):
-            click.echo(f"[{index+1}] {vm['name']} ({ vm['guest.net'][0] if vm.get('guest.net') else '-'})")
-
-        try:
-            answer = int(input("Choose the index number of virtual machine to start: "))
-            vm = result[answer-1]['obj']
-        except:
-            click.ClickException(
-                message=f"Wrong choice. Abort!"
-            )
-        
-        if vm.runtime.powerState == "poweredOn":
-            click.echo(f"Virtual machine [{vm.name}] already {vm.runtime.powerState}")
-            ctx.exit(0)    
-    
+    vms = helpers.select_vms(result, action="start", select_all=select_all or bool(uuid))
     parameters = {
         "config": config,
-        "vm": vm
+        "vms": vms,
+        "action": "start"
     }
 
-    poweringon = Threading(helpers.poweringon_vm, **parameters)
-    poweringon_progressbar = click.progressbar(poweringon.progress, label=f"Starting Virtual Machine [{vm.name}]") 
+    poweringon = Threading(helpers.powering_vms, **parameters)
+    poweringon_progressbar = click.progressbar(poweringon.progress, label=f"Starting {len(vms)} Virtual Machines") 
     with poweringon_progressbar as progressbar:
         for progress in progressbar:
             if poweringon.exception:
@@ -145,19 +147,18 @@ def start(ctx, vm_name, uuid, hostname, insecure):
                 result = progress
                 break
 
-    
-    click.echo(f"Virtual machine [{vm.name}] already {vm.runtime.powerState}")    
+    helpers.show_power_result(result)
 
-@cli.command("restart", help="Restart a virtual machine in vCenter Server Appliance")
+@cli.command("restart", help="Restart virtual machines in vCenter Server Appliance")
 @click.argument("vm_name", required=False)
 @click.option("--ipaddr", help="IP address for virtual machine")
 @click.option("--hostname", help="VM hostname")
-@click.option("--uuid", help="VM UUID Instance")
+@click.option("--uuid", callback=callbacks.convert2list, help="VM UUID Instance (comma separated for many virtual machines)")
 @click.option("-i","--insecure-search", "insecure", is_flag=True, help="Insecure Search (mean searching with ignoring vmware-tools)")
+@click.option("-a", "--all", "select_all", is_flag=True, help="Select all the matched virtual machines")
 @click.option("-y", "--yes", is_flag=True, help="Answer yes for all prompt question")
 @click.pass_context
-def restart(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
-    config = ctx.obj["CONFIG"]
+def restart(ctx, vm_name, ipaddr, hostname, uuid, insecure, select_all, yes):
     config = ctx.obj["CONFIG"]
     parameters = {
         "config": config, 
@@ -168,43 +169,29 @@ def restart(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
         "insecure": insecure
     }
 
-    searching = Threading(helpers.searching_vm, **parameters)
-    
     param = vm_name or ipaddr or hostname or uuid
+    if not param:
+        raise click.ClickException("No argument or option found")
+
+    searching = Threading(helpers.searching_vm, **parameters)
     searching_progressbar = click.progressbar(searching.progress, label=f"Searching Virtual Machine ") 
     with searching_progressbar as progressbar:
         for progress in progressbar:
             if searching.exception:
-                click.echo(f"Error: {searching.exception}")
-                ctx.exit(1)
-                break
+                raise click.ClickException(searching.exception)
                 
             if progress is not None: 
                 result = progress
                 break
 
+    result = list(filter(lambda x: x['runtime.powerState'] == 'poweredOn', helpers.as_records(result)))
     if not result:
-        raise click.ClickException()
+        click.echo(f"No powered on virtual machine are found")
         ctx.exit(1)
 
-    if uuid:
-        vm = result
-    else:
-        result = list(filter(lambda x: x['runtime.powerState'] == 'poweredOn', result))
-        click.echo(f"==> {len(result)} virtual machines found")
-        for index, vm in enumerate(result):        
-            click.echo(f"[{index+1}] {vm['name']} ({ vm['guest.net'][0] if vm.get('guest.net') else '-'})")
-        
-        try:
-            answer = int(input("Choose the index number of virtual machine to restart: "))
-            vm = result[answer-1]['obj']
-        except:
-            raise click.ClickException(
-                message=f"Wrong choice. Abort!"
-            )
-        
+    vms = helpers.select_vms(result, action="restart", select_all=select_all or bool(uuid))
     answer = yes or prompt_y_n_question(
-        f"Are you sure to stop virtual machine [{vm.name}] in datacenter [{config['vcenter']['datacenter']}] ?",
+        f"Are you sure to restart virtual machines [{', '.join(vm['name'] for vm in vms)}] in datacenter [{helpers.target_datacenters(config)}] ?",
         default="no"
     )
     if not answer:
@@ -212,11 +199,12 @@ def restart(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
     
     parameters = {
         "config": config,
-        "vm": vm
+        "vms": vms,
+        "action": "restart"
     }
 
-    restarting = Threading(helpers.restarting_vm, **parameters)
-    restarting_progressbar = click.progressbar(restarting.progress, label=f"Restarting Virtual Machine [{vm.name}]") 
+    restarting = Threading(helpers.powering_vms, **parameters)
+    restarting_progressbar = click.progressbar(restarting.progress, label=f"Restarting {len(vms)} Virtual Machines") 
     with restarting_progressbar as progressbar:
         for progress in progressbar:
             if restarting.exception:
@@ -226,18 +214,18 @@ def restart(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
                 result = progress
                 break
 
+    helpers.show_power_result(result)
 
-    click.echo(f"Virtual machine [{vm.name}] restarted")
-
-@cli.command("stop", help="Stop a virtual machine in vCenter Server Appliance")
-@click.argument("vm_name")
+@cli.command("stop", help="Stop virtual machines in vCenter Server Appliance")
+@click.argument("vm_name", required=False)
 @click.option("--ipaddr", help="IP address for virtual machine")
 @click.option("--hostname", help="VM hostname")
-@click.option("--uuid", help="VM UUID Instance")
+@click.option("--uuid", callback=callbacks.convert2list, help="VM UUID Instance (comma separated for many virtual machines)")
 @click.option("-i","--insecure-search", "insecure", is_flag=True, help="Insecure Search (mean searching with ignoring vmware-tools)")
+@click.option("-a", "--all", "select_all", is_flag=True, help="Select all the matched virtual machines")
 @click.option("-y", "--yes", is_flag=True, help="Answer yes for all prompt question")
 @click.pass_context
-def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
+def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, select_all, yes):
     config = ctx.obj["CONFIG"]
     parameters = {
         "config": config, 
@@ -248,8 +236,10 @@ def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
         "insecure": insecure
     }
 
-    
     param = vm_name or ipaddr or hostname or uuid
+    if not param:
+        raise click.ClickException("No argument or option found")
+
     searching = Threading(helpers.searching_vm, **parameters)
     searching_progressbar = click.progressbar(searching.progress, label=f"Searching Virtual Machine ") 
     with searching_progressbar as progressbar:
@@ -261,33 +251,14 @@ def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
                 result = progress
                 break
 
+    result = list(filter(lambda x: x['runtime.powerState'] == 'poweredOn', helpers.as_records(result)))
     if not result:
-        click.echo(f"No virtual machine are found")
+        click.echo(f"No powered on virtual machine are found")
         ctx.exit(1)
 
-    if uuid:
-        vm = result
-    else:
-        result = list(filter(lambda x: x['runtime.powerState'] == 'poweredOn', progress))
-        click.echo(f"==> {len(result)} virtual machines found")
-        for index, vm in enumerate(result):        
-            click.echo(f"[{index+1}] {vm['name']} ({ vm['guest.net'][0] if vm.get('guest.net') else '-'})")
-        
-        try:
-            answer = int(input("Choose the index number of virtual machine to stop: "))
-            vm = result[answer-1]['obj']
-        except:
-            raise click.ClickException(
-                message=f"Wrong choice. Abort!"
-            )
-
-    if vm.runtime.powerState == "poweredOff":
-        raise click.ClickException(
-            message=f"Virtual machine [{vm.name}] already {vm.runtime.powerState}"
-        )
-    
+    vms = helpers.select_vms(result, action="stop", select_all=select_all or bool(uuid))
     answer = yes or prompt_y_n_question(
-        f"Are you sure to stop virtual machine [{vm.name}] in datacenter [{config['vcenter']['datacenter']}] ?",
+        f"Are you sure to stop virtual machines [{', '.join(vm['name'] for vm in vms)}] in datacenter [{helpers.target_datacenters(config)}] ?",
         default="no"
     )
     if not answer:
@@ -295,11 +266,12 @@ def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
     
     parameters = {
         "config": config,
-        "vm": vm
+        "vms": vms,
+        "action": "stop"
     }
 
-    poweringoff = Threading(helpers.poweringoff_vm, **parameters)
-    poweringoff_progressbar = click.progressbar(poweringoff.progress, label=f"Powering Off Virtual Machine [{vm.name}]") 
+    poweringoff = Threading(helpers.powering_vms, **parameters)
+    poweringoff_progressbar = click.progressbar(poweringoff.progress, label=f"Powering Off {len(vms)} Virtual Machines") 
     with poweringoff_progressbar as progressbar:
         for progress in progressbar:
             if poweringoff.exception:
@@ -309,7 +281,7 @@ def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
                 result = progress
                 break
 
-    click.echo(f"Virtual machine [{vm.name}] already {vm.runtime.powerState}")
+    helpers.show_power_result(result)
 
 @cli.command(aliases=["new", "make"], help="Create a virtual machine in vCenter Server Appliance")
 @click.argument("service")
@@ -320,11 +292,14 @@ def stop(ctx, vm_name, ipaddr, hostname, uuid, insecure, yes):
 @click.option("--memory", type=click.IntRange(min=1024, max=1024*64), default=1024, help="Memory size for virtual machine (MB)", show_default=True)
 @click.option("--replicas", type=click.INT, default=1, help="Number of replicas for virtual machine", show_default=True)
 @click.option("--paralel", type=click.INT, default=4, help="Limit the number of paralel works", show_default=True)
+@click.option("--guest-timeout", type=click.INT, help="Maximum time to wait the guest to be ready in seconds (inherited from configuration file, default: 600)")
+@click.option("--clone-mode", type=click.Choice(["full", "linked", "instant"]), help="Clone mode of virtual machine (inherited from configuration file, default: full)")
 @click.option("-b", "--bootstrap", is_flag=True, help="If selected, virtual machines will start bootstrap after available")
 @click.option("-d", "--debug", is_flag=True, help="Debugging virtual machine creation process")
 @click.pass_context
-def create(ctx, service, environment, category, folder, cpus, memory, replicas, paralel, bootstrap, debug):
+def create(ctx, service, environment, category, folder, cpus, memory, replicas, paralel, guest_timeout, clone_mode, bootstrap, debug):
     config = ctx.obj["CONFIG"]
+    helpers.single_target(config)
     
     if environment not in config["vcenter.environments"]["available"]:
         raise click.ClickException(f"Environment {environment !r} are not available. Check ({ctx.obj['CONFIG_PATH']})")
@@ -342,11 +317,14 @@ def create(ctx, service, environment, category, folder, cpus, memory, replicas,
     template = _category.get("template") or _environment.get("template")
     datastore = _category.get("datastore") or _environment.get("datastore")
     datastore_cluster = _category.get("datastore_cluster") or _environment.get("datastore_cluster")
-    compute = _category.get("compute") or _environment.get("compute") 
+    compute_candidates = list(_category.get("compute_candidates") or _environment.get("compute_candidates") or [])
+    datastore_candidates = list(_category.get("datastore_candidates") or _environment.get("datastore_candidates") or [])
+    compute = _category.get("compute") or _environment.get("compute") or (compute_candidates[0] if compute_candidates else None)
     network = _category.get("network") or _environment.get("network")
     folder = folder or _category.get("folder") or _environment.get("folder")
     name_format = _category.get("name_format") or _environment.get("name_format")
     hostname_format = _category.get("hostname_format") or _environment.get("hostname_format")
+    clone_mode = clone_mode or _category.get("clone_mode") or _environment.get("clone_mode") or "full"
 
     click.echo(f"\nCerberus v{__version__}\n")
     click.echo(f"==== Summary of Requirements ====")
@@ -358,6 +336,7 @@ def create(ctx, service, environment, category, folder, cpus, memory, replicas,
     click.echo(f"Number of CPUs: {cpus !r} Core")
     click.echo(f"Memory Size: {memory !r} MB")
     click.echo(f"Replicas: {replicas !r}")
+    click.echo(f"Clone Mode: {clone_mode !r}")
     click.echo(f"Bootstrap: {'yes' if bootstrap else 'no'}\n")
 
     _name = str.upper(name_format.format(
@@ -420,8 +399,11 @@ def create(ctx, service, environment, category, folder, cpus, memory, replicas,
             "datastore": datastore,
             "datastore_cluster": datastore_cluster,
             "compute": compute,
+            "compute_candidates": compute_candidates,
+            "datastore_candidates": datastore_candidates,
             "folder": folder,
             "network": network_config,
+            "clone_mode": clone_mode,
             "bootstrap": bootstrap,
             "debug": debug
         } for name, hostname in _replicas
@@ -432,25 +414,22 @@ def create(ctx, service, environment, category, folder, cpus, memory, replicas,
     creating = Threading(helpers.creating_vm, **{
         "config": config,
         "specs": specs,
-        "paralel": paralel
+        "paralel": paralel,
+        "guest_timeout": guest_timeout
     })
     
     result_vms = helpers.waiting_process(thread=creating, title="Creating virtual machines")
 
-    waiting = Threading(helpers.waiting_vm, **{
-        "specs": result_vms,
-        "paralel": paralel
-    })
-
-    result_vms = helpers.waiting_process(thread=waiting, title="Waiting virtual machines to live")
-
-    if bootstrap:
+    # Only the virtual machines which guest is ready (creating_vm) are bootstrapped
+    ready_vms = [spec for spec in result_vms if spec.get("ready")]
+    if bootstrap and ready_vms:
         bootstraping = Threading(helpers.bootstraping_vm, **{
             "config": config,
-            "specs": result_vms,
+            "specs": ready_vms,
             "paralel": paralel
         })
-        result_vms = helpers.waiting_process(thread=bootstraping, title="Bootstraping virtual machines")
+        ready_vms = helpers.waiting_process(thread=bootstraping, title="Bootstraping virtual machines")
+        result_vms = ready_vms + [spec for spec in result_vms if not spec.get("ready")]
 
     helpers.show_vm_result(result_vms)
     helpers.make_logs(config, result_vms, action="Create")
@@ -466,6 +445,7 @@ def create(ctx, service, environment, category, folder, cpus, memory, replicas,
 @click.pass_context
 def destroy(ctx, vm_name, fqdn, ipaddr, uuid, paralel, yes, force):
     config = ctx.obj["CONFIG"]
+    helpers.single_target(config)
     config["force"] = force
 
     if fqdn:
@@ -562,6 +542,7 @@ def destroy(ctx, vm_name, fqdn, ipaddr, uuid, paralel, yes, force):
 @click.pass_context
 def importing(ctx):
     config = ctx.obj["CONFIG"]
+    helpers.single_target(config)
     available_environment = config["vcenter.environments"]["available"]
 
     parameters = {"config": config}
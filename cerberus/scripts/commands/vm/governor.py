@@ -0,0 +1,132 @@
+import functools
+import threading
+import collections
+
+class Governor(object):
+    """ Concurrency Governor Class
+
+    This class dispatch the works (virtual machine clone/destroy) to the process pool
+    (map), or split the works into batches which are submitted together (batches), while keeping the number of in-flight works of each target (host, datastore)
+    under its limit. vCenter queue the provisioning operations per host and datastore,
+    so the works are dispatched to the least busy targets first instead of dumping
+    everything on the same datastore.
+
+    >>  Note: A work is only dispatched when the pool has a free process, so the pending
+              works could still be reordered. A limit of 0 (or None) means unlimited.
+    """
+
+    def __init__(self, paralel=3, **limits):
+        """
+            Constructor
+
+            :param paralel: Maximum number of in-flight works (pool processes)
+            :param limits: Maximum number of in-flight works for each target kind (e.g. host=8, datastore=4)
+        """
+        self.paralel = max(1, paralel)
+        self.limits = dict((kind, limit) for kind, limit in limits.items() if limit)
+        self.inflight = collections.Counter()
+        self.running = 0
+        self.condition = threading.Condition()
+
+    def fits(self, targets):
+        if self.running >= self.paralel:
+            return False
+        return all(
+            self.inflight[target] < self.limits[target[0]]
+            for target in targets if target[0] in self.limits
+        )
+
+    def load(self, targets):
+        """
+            The busiest target of the work (in-flight ratio to its limit)
+        """
+        return max([
+            float(self.inflight[target]) / self.limits[target[0]]
+            for target in targets if target[0] in self.limits
+        ] or [0.0])
+
+    def acquire(self, targets):
+        self.running += 1
+        for target in targets:
+            self.inflight[target] += 1
+
+    def release(self, targets, *args):
+        with self.condition:
+            self.running -= 1
+            for target in targets:
+                self.inflight[target] -= 1
+            self.condition.notify_all()
+
+    def batches(self, items, targets):
+        """
+            Split the works into batches which are submitted together,
+            each batch is under the limits (and paralel)
+
+            :param items: List of work arguments
+            :param targets: List of the targets of each work (same like map())
+            :return: A yield of the list of work arguments
+            :rtype: Generator
+        """
+        pending = [
+            (item, tuple(target for target in work_targets if target[1]))
+            for item, work_targets in zip(items, targets)
+        ]
+
+        while pending:
+            batch, rest = [], []
+            with self.condition:
+                for item, work_targets in pending:
+                    if self.fits(work_targets):
+                        self.acquire(work_targets)
+                        batch.append(item)
+                    else:
+                        rest.append((item, work_targets))
+
+                self.running = 0
+                self.inflight.clear()
+
+            pending = rest
+            yield batch
+
+    def map(self, pool, func, items, targets):
+        """
+            Same like pool.map(), but the works are dispatched by the governor,
+            a failed work does not stop the others, its exception is returned instead of its result
+
+            :param pool: multiprocessing.Pool
+            :param func: Function of the work
+            :param items: List of work arguments
+            :param targets: List of the targets of each work, the target is a tuple of kind
+                and managed object id (e.g. [("host", "host-12"), ("datastore", "datastore-40")])
+            :return: List of the work results or exceptions (in the items order)
+            :rtype: list
+        """
+        pending = collections.deque(
+            (index, item, tuple(target for target in work_targets if target[1]))
+            for index, (item, work_targets) in enumerate(zip(items, targets))
+        )
+        results = [None] * len(pending)
+
+        with self.condition:
+            while pending:
+                candidates = [work for work in pending if self.fits(work[2])]
+                if not candidates:
+                    self.condition.wait()
+                    continue
+
+                # The least busy targets first, the earlier work wins on a tie
+                work = min(candidates, key=lambda work: self.load(work[2]))
+                pending.remove(work)
+
+                index, item, work_targets = work
+                self.acquire(work_targets)
+                release = functools.partial(self.release, work_targets)
+                results[index] = pool.apply_async(func, (item,), callback=release, error_callback=release)
+
+        outcomes = []
+        for result in results:
+            try:
+                outcomes.append(result.get())
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
@@ -1,27 +1,51 @@
 
+import os
 import time
 import click
+import queue
 import random
+import threading
 import ipaddress
-import subprocess
 import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 
 from cerberus import phpipam
+from cerberus.phpipam import aio
 from cerberus.provisioner.core import KnifeBootstrap
 from cerberus.scripts.config import ConfigFileProcessor
-from cerberus.utils import parser
+from cerberus.utils import parser, stats
 from cerberus.vsphere import errors
+from cerberus.vsphere.records import VMRecord
 
 from cerberus.scripts.utils import (
     prompt_y_n_question,
     Threading
 )
+from .governor import Governor
 from .services import init_vm_service
-from ..ipam.services import init_ipam_service
+from ..ipam.services import (
+    init_ipam_service,
+    init_async_ipam_service
+)
 from ..dns.services import init_dns_service
 
-def show_vm(vm_data):
-    if isinstance(vm_data, list):
+VM_DESTROY_PROPERTIES = [
+    "name",
+    "config.uuid",
+    "guest.hostName",
+    "guest.net",
+    "runtime.host",
+    "datastore"
+]
+
+def show_vm(vm_data, datacenter=False):
+    if isinstance(vm_data, list) and datacenter:
+        output = parser.BeautifyFormat.from_dict(
+            vm_data,
+            headers=["DATACENTER", "UUID", "STATUS", "IP", "NAME"],
+            attr=["datacenter", "config.uuid", "runtime.powerState", "guest.net", "name"]
+        )
+    elif isinstance(vm_data, list):
         output = parser.BeautifyFormat.from_dict(
             vm_data,
             headers=["UUID", "STATUS", "IP", "NAME"],
@@ -36,6 +60,30 @@ def show_vm(vm_data):
     click.clear()
     click.echo("\n".join(output))
 
+def show_vm_stream(vm_data, datacenter=False):
+    """
+        Show virtual machines as soon as the data arrived
+        :return: Number of virtual machines
+    """
+    count = 0
+    headers = ["UUID", "STATUS", "IP", "NAME"]
+    attr = ["config.uuid", "runtime.powerState", "guest.net", "name"]
+    widths = [36, 10, 15]
+    if datacenter:
+        headers, attr, widths = ["DATACENTER"] + headers, ["datacenter"] + attr, [15] + widths
+
+    output = parser.BeautifyFormat.from_stream(
+        vm_data,
+        headers=headers,
+        attr=attr,
+        widths=widths
+    )
+    click.clear()
+    for line in output:
+        click.echo(line)
+        count += 1
+    return count - 1
+
 def show_vm_result(results):
     for result in results:
         if not result.get("bootstrap"):
@@ -50,34 +98,159 @@ def show_vm_result(results):
     click.clear()
     click.echo("\n".join(output))
 
+# Long-lived services of the current process (keyed by process id and vCenter target),
+# so every pool task on the same worker process uses the same session
+_services = {}
+
 def setup_service(config):
     vcenter_obj = config["vcenter"]
+    key = (
+        os.getpid(),
+        vcenter_obj.get("host"),
+        vcenter_obj.get("port"),
+        vcenter_obj.get("user"),
+        vcenter_obj.get("datacenter")
+    )
+    service = _services.get(key)
+    if service is not None:
+        return service
+
     service = init_vm_service(vcenter_obj)
     service.connect(
         user=vcenter_obj.get('user'),
         pwd=vcenter_obj.get('pwd')
     )
     service.datacenter = vcenter_obj.get("datacenter")
+    _services[key] = service
     return service
 
 def importing_vm(config):
     service = setup_service(config)
     return service.lookup_vms()
 
-def searching_vm(config, vm_name=None, ipaddr=None, hostname=None, uuid=None, insecure=None):
+def resolve_targets(config, datacenter=None):
+    """
+        Resolve the vCenter targets of the datacenter option,
+        the datacenter are looked up on [vcenter.datacenters] available list ("all" for every datacenter),
+        otherwise the datacenter is the datacenter name on the [vcenter] section
+
+        :return: List of vCenter configuration ([vcenter] merged with [vcenter.datacenters.<id>], with "id")
+        :rtype: list
+    """
+    vcenter_obj = config["vcenter"]
+    available = list(config.get("vcenter.datacenters", {}).get("available") or [])
+
+    if datacenter == "all":
+        if not available:
+            raise click.BadParameter(
+                message=f"No datacenter are available on [vcenter.datacenters] section",
+                param_hint="datacenter"
+            )
+        identifiers = available
+    elif datacenter and datacenter in available:
+        identifiers = [datacenter]
+    else:
+        if datacenter:
+            vcenter_obj["datacenter"] = datacenter
+        return [vcenter_obj]
+
+    return [
+        dict(vcenter_obj, id=identifier, **config.get(f"vcenter.datacenters.{identifier}", {}))
+        for identifier in identifiers
+    ]
+
+def target_datacenters(config):
+    """
+        :return: The datacenter names of every vCenter target (for the prompt)
+        :rtype: str
+    """
+    targets = config.get("vcenter.targets") or [config["vcenter"]]
+    return ", ".join(str(target.get("datacenter")) for target in targets)
+
+def single_target(config):
+    targets = config.get("vcenter.targets") or [config["vcenter"]]
+    if len(targets) > 1:
+        raise click.ClickException(
+            message="Datacenter [all] are only supported on find, start, stop and restart command"
+        )
+    return targets[0]
+
+def searching_vm(config, vm_name=None, ipaddr=None, hostname=None, uuid=None, insecure=None, stream=False):
+    targets = config.get("vcenter.targets") or [config["vcenter"]]
+    if len(targets) == 1:
+        return searching_target(config, vm_name, ipaddr, hostname, uuid, insecure, stream)
+
+    return fanout_vm(config, targets, searching_target, stream=stream, **dict(
+        vm_name=vm_name,
+        ipaddr=ipaddr,
+        hostname=hostname,
+        uuid=uuid,
+        insecure=insecure
+    ))
+
+def fanout_vm(config, targets, func, stream=False, **kwargs):
+    """
+        Run the search on every vCenter target concurrently (one session for each target),
+        the results are merged as virtual machine records with the datacenter identifier
+
+        :return: A yield of virtual machine record if stream is set, otherwise list of virtual machine record
+    """
+    results = queue.Queue()
+
+    def run(target):
+        try:
+            result = func(dict(config, vcenter=target), stream=stream, **kwargs)
+            for vm in iter_records(result):
+                if isinstance(vm, VMRecord):
+                    vm = vm.replace(datacenter=target.get("id"))
+                else:
+                    vm = dict(vm, datacenter=target.get("id"))
+                results.put(vm)
+        except Exception as exc:
+            results.put(RuntimeError(f"{exc} ({target.get('id')})"))
+        finally:
+            results.put(None)
+
+    for target in targets:
+        thread = threading.Thread(target=run, args=(target,))
+        thread.daemon = True
+        thread.start()
+
+    def merged():
+        done = 0
+        while done < len(targets):
+            item = results.get()
+            if item is None:
+                done += 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+
+    return merged() if stream else list(merged())
+
+def searching_target(config, vm_name=None, ipaddr=None, hostname=None, uuid=None, insecure=None, stream=False):
     service = setup_service(config)
-    if vm_name:
+    if vm_name and stream:
+        result = service.lookup_vms(name=vm_name)
+    elif vm_name:
         result = service.search_vms(name=vm_name)
+    elif uuid and isinstance(uuid, (list, tuple)):
+        result = as_records([vm for vm in (service.search_vm(uuid=u) for u in uuid) if vm])
     elif uuid:
         result = service.search_vm(uuid=uuid)
     elif ipaddr:
-        if insecure: 
+        if insecure and stream: 
+            result = service.lookup_vms(ipaddr=ipaddr)
+        elif insecure: 
             result = service.search_vms(ipaddr=ipaddr)
         else: 
             result = service.search_vm(ipaddr=ipaddr)
         
     elif hostname:
-        if insecure: 
+        if insecure and stream: 
+            result = service.lookup_vms(hostname=hostname)
+        elif insecure: 
             result = service.search_vms(hostname=hostname)
         else: 
             result = service.search_vms(fqdn=hostname)
@@ -87,48 +260,490 @@ def searching_vm(config, vm_name=None, ipaddr=None, hostname=None, uuid=None, in
         )
     return result or []
 
-def poweringon_vm(config, vm):
-    vmname = vm.name
-    service = setup_service(config)
-    result = service.wait_for_task("Powering On", vm.PowerOnVM_Task())
-    return f"Powering On {vm.name}"
+def powering_vms(config, vms, action):
+    targets = dict(
+        (target.get("id"), target) for target in config.get("vcenter.targets") or [config["vcenter"]]
+    )
+
+    # The power operations are submitted together for each vCenter target
+    groups = {}
+    for vm in vms:
+        groups.setdefault(vm.get("datacenter"), []).append(vm)
+
+    results = []
+    for identifier, group in groups.items():
+        service = setup_service(dict(config, vcenter=targets.get(identifier, config["vcenter"])))
+        result = service.power_vms([vm["obj"] for vm in group], action=action)
+        results.extend(
+            {
+                "name": vm["name"],
+                "datacenter": identifier,
+                "action": action.upper(),
+                "result": result.get(vm["obj"]._moId, "-")
+            } for vm in group
+        )
+    return results
+
+def show_power_result(results):
+    output = parser.BeautifyFormat.from_dict(
+        results,
+        headers=["NAME", "DATACENTER", "ACTION", "RESULT"],
+        attr=["name", "datacenter", "action", "result"]
+    )
+    click.echo("\n".join(output))
+
+def as_records(result):
+    """
+        Convert the search result to list of virtual machine record,
+        the result of search_vm() or the fqdn search are virtual machine objects
+    """
+    return list(iter_records(result))
+
+def iter_records(result):
+    if not result:
+        return
+
+    if isinstance(result, (dict, VMRecord)) or not hasattr(result, "__iter__"):
+        result = [result]
+
+    for vm in result:
+        if isinstance(vm, (dict, VMRecord)):
+            yield vm
+            continue
+
+        yield VMRecord(
+            name=vm.name,
+            uuid=vm.config.uuid,
+            power_state=vm.runtime.powerState,
+            addresses=[vm.guest.ipAddress] if vm.guest.ipAddress else None,
+            obj=vm
+        )
+
+def select_vms(vms, action, select_all=False):
+    if select_all:
+        return vms
+
+    click.echo(f"==> {len(vms)} virtual machines found")
+    click.echo("[*] All virtual machine on listed below")
+    for index, vm in enumerate(vms):
+        datacenter = f" @{vm['datacenter']}" if vm.get("datacenter") else ""
+        click.echo(f"[{index+1}] {vm['name']} ({ vm['guest.net'][0] if vm.get('guest.net') else '-'}){datacenter}")
+
+    answer = input(f"Choose the index number of virtual machine to {action} (comma separated for many): ")
+    if answer.strip() == "*":
+        return vms
 
-def poweringoff_vm(config, vm):
-    vmname = vm.name
-    service = setup_service(config)
-    result = service.wait_for_task("Powering Off", vm.PowerOffVM_Task())
-    return f"Powering Off {vmname}"
-    
-def restarting_vm(config, vm):
-    vmname = vm.name
-    service = setup_service(config)
     try:
-        result = service.wait_for_task("Rebooting", vm.RebootGuest())
-    except:
-        result = service.wait_for_task("Restarting", vm.ResetVM_Task())
-    return f"Restarting {vmname}"
+        indexes = [int(index) for index in answer.split(",")]
+        if not all(0 < index <= len(vms) for index in indexes):
+            raise ValueError(answer)
+    except ValueError:
+        raise click.ClickException(
+            message=f"Wrong choice. Abort!"
+        )
+    return [vms[index-1] for index in indexes]
 
 def use_config(conf):
     global gconfig
     gconfig = conf
 
-def creating_vm(config, specs, paralel=3):
-    pool = multiprocessing.Pool(processes=paralel, initializer=use_config, initargs=(config,))
-    result = pool.map(multi_create_vm, specs)
-    return result
+def planning_vm(config, specs):
+    """
+        Resolve the placement resources (template, network, folder, compute, datastore)
+        and the phpIPAM subnet once in the parent process, instead of once per replica.
+        The plan (managed object id) is attached to every spec as "plan"
+    """
+    vsphere_service = setup_service(config)
+    ipam_service = init_ipam_service(config["phpipam"])
+
+    plans = {}
+    subnets = {}
+    batches = {}
+    for spec in specs:
+        # The replicas share the same network configuration, each replica has its own address
+        _network = spec["network"] = dict(spec.get("network"))
+
+        key = (
+            spec.get("template"),
+            spec.get("template_path"),
+            _network.get("name"),
+            spec.get("folder"),
+            spec.get("compute"),
+            spec.get("datastore"),
+            spec.get("clone_mode") or "full"
+        )
+        if key not in plans:
+            plans[key] = vsphere_service.make_plan(*key)
+
+        cidr = _network.get("cidr")
+        if cidr not in subnets:
+            subnet = ipam_service.show_subnet(cidr=cidr, cached=False)
+            subnets[cidr] = dict(id=subnet.id)
+            if not _network.get("dhcp"):
+                subnets[cidr].update(
+                    gateway=subnet.gateway.ip_addr,
+                    netmask=getattr(subnet.calculation, "Subnet netmask")
+                )
+
+        spec["plan"] = dict(plans[key], subnet=subnets[cidr])
+        batches.setdefault(key + (spec.get("datastore_cluster"),), []).append(spec)
+
+    for key, batch in batches.items():
+        if batch[0].get("compute_candidates") or batch[0].get("datastore_candidates"):
+            placing_vm(vsphere_service, batch)
+
+        if len(batch) > 1 and not batch[0]["plan"]["datastore"] and batch[0].get("datastore_cluster"):
+            spreading_vm(vsphere_service, batch)
+
+    # The addresses of all the replicas are reserved at once for each subnet (after the placement),
+    # so the workers do not race for the first free address
+    reservations = {}
+    for spec in specs:
+        if not spec["network"].get("dhcp") and not spec["network"].get("address"):
+            reservations.setdefault(spec["plan"]["subnet"]["id"], []).append(spec)
+
+    reserved = []
+    try:
+        for subnet_id, subnet_specs in reservations.items():
+            addresses = ipam_service.reserve_ipaddrs(
+                len(subnet_specs),
+                subnet_id=subnet_id,
+                payload=dict(description="Reserved by Cerberus Suites.")
+            )
+            for spec, address in zip(subnet_specs, addresses):
+                spec["network"]["address"] = address
+                reserved.append(spec)
+    except Exception:
+        releasing_ipaddr(config, reserved)
+        raise
+    return specs
+
+def placing_vm(vsphere_service, specs):
+    """
+        Place the replicas of a batch on the candidate computes and datastores
+        (compute_candidates, datastore_candidates) which have the most free capacity,
+        the capacity of the candidates are taken once for the batch
+    """
+    plan = specs[0]["plan"]
+    engine = vsphere_service.make_placement(
+        computes=specs[0].get("compute_candidates") or [specs[0].get("compute")],
+        datastores=specs[0].get("datastore_candidates")
+    )
+
+    disk = 0
+    if specs[0].get("datastore_candidates") and plan["clone_mode"] == "full":
+        disk = vsphere_service.use_plan(plan)["template"].summary.storage.committed
+
+    for spec in specs:
+        pool, datastore = engine.place(
+            num_cpus=spec.get("num_cpus") or 1,
+            memory=spec.get("memory") or 1024,
+            disk=disk
+        )
+        if pool is not None:
+            spec["plan"]["compute"] = pool._moId
+        if datastore is not None:
+            spec["plan"]["datastore"] = datastore._moId
+    return specs
+
+def spreading_vm(vsphere_service, specs):
+    """
+        Spread the replicas of a batch across the datastores recommended by Storage DRS
+        (round-robin), so the clones are not queued on the same datastore.
+        When Storage DRS recommends less than two datastores, the replicas are left
+        to the Storage DRS placement of each clone
+    """
+    resources = vsphere_service.use_plan(specs[0]["plan"])
+    clonespec = vsphere_service.make_vm_clonespec(
+        vm_relocatespec=vsphere_service.make_vm_relocatespec(
+            resource_pool=resources["compute"],
+            datastore=None
+        )
+    )
+    datastores = vsphere_service.recommend_datastores(
+        name=specs[0].get("name"),
+        template=resources["template"],
+        folder=resources["folder"],
+        clonespec=clonespec,
+        dscluster=specs[0].get("datastore_cluster")
+    )
+    if len(datastores) < 2:
+        return specs
+
+    for index, spec in enumerate(specs):
+        spec["plan"]["datastore"] = datastores[index % len(datastores)]._moId
+    return specs
+
+def make_governor(config, paralel=3):
+    """
+        Governor of the clone/destroy works, limited by the number of in-flight works
+        for each host (host_limit) and each datastore (datastore_limit)
+    """
+    return Governor(
+        paralel=paralel,
+        host=config["vcenter"].get("host_limit", 8),
+        datastore=config["vcenter"].get("datastore_limit", 4)
+    )
+
+def clone_targets(spec):
+    """
+        The clone is running on the source host and writing the destination datastore.
+        The source datastore is not counted, otherwise all the clones of a template
+        are limited by its datastore. The destination which is left to Storage DRS is unknown,
+        so it is not counted either
+    """
+    plan = spec["plan"]
+    return [
+        ("host", plan.get("source_host")),
+        ("datastore", plan.get("datastore"))
+    ]
+
+def creating_vm(config, specs, paralel=3, guest_timeout=None):
+    specs = planning_vm(config, specs)
+    try:
+        pool = multiprocessing.Pool(processes=paralel, initializer=use_config, initargs=(config,))
+        governor = make_governor(config, paralel=paralel)
+        results = governor.map(pool, multi_create_vm, specs, targets=[clone_targets(spec) for spec in specs])
+    except Exception:
+        # The works are not started, so the reserved addresses are released
+        releasing_ipaddr(config, specs)
+        raise
+
+    created = [result for result in results if not isinstance(result, Exception)]
+    failed = [(spec, result) for spec, result in zip(specs, results) if isinstance(result, Exception)]
+    if failed:
+        failing_vm(config, failed)
+        if not created:
+            raise RuntimeError(f"Unable to create virtual machines ({failed[0][1]})")
+
+    return waiting_guest(config, created, timeout=guest_timeout)
+
+def failing_vm(config, failed):
+    """
+        Report the virtual machines which are failed to be created and release their reserved addresses
+
+        :param failed: List of tuple of the spec and its exception
+    """
+    for spec, exc in failed:
+        click.echo(f"Unable to create {spec.get('name')} ({exc})")
+    releasing_ipaddr(config, [spec for spec, exc in failed])
+
+def releasing_ipaddr(config, specs):
+    """
+        Release the reserved addresses of the virtual machines which are not created,
+        the phpIPAM error is only reported
+    """
+    if not specs:
+        return
+
+    ipam_service = init_ipam_service(config["phpipam"])
+    for spec in specs:
+        _network = spec.get("network") or {}
+        if _network.get("dhcp") or not _network.get("address"):
+            continue
+
+        try:
+            ipam_service.release_ipaddr(
+                address=_network.get("address"),
+                subnet_id=spec["plan"]["subnet"]["id"]
+            )
+        except phpipam.errors.Error as exc:
+            click.echo(f"Unable to release address {_network.get('address')} of {spec.get('name')} ({exc})")
+
+def waiting_guest(config, specs, timeout=None):
+    """
+        Wait for the guest of the new virtual machines to be ready (watched at once),
+        each virtual machine is registered to phpIPAM and DNS as soon as its guest is ready
+    """
+    vsphere_service = setup_service(config)
+    timeout = timeout or config["vcenter"].get("guest_timeout") or 600
+
+    specs_by_vm = dict((spec["vm"], spec) for spec in specs)
+
+    # Instant clone report the address of the source until its network is reconfigured,
+    # so the instant clone is only ready when it reports the reserved address,
+    # or any address other than the source address (DHCP)
+    instants = [spec for spec in specs if spec["plan"]["clone_mode"] == "instant"]
+    expected = dict(
+        (spec["vm"], spec["network"]["address"]) for spec in instants
+        if not spec["network"].get("dhcp")
+    )
+    excluded = dict(
+        (spec["vm"], spec["plan"].get("source_addresses") or []) for spec in instants
+        if spec["network"].get("dhcp")
+    )
+
+    for vm, address in vsphere_service.wait_for_guests(list(specs_by_vm), timeout=timeout, expected=expected, excluded=excluded):
+        spec = specs_by_vm[vm._moId]
+        spec["ready"] = address is not None
+        if address is None:
+            click.echo(f"Guest of {spec['name']} is not ready after {timeout} seconds, skip phpIPAM and DNS registration")
+            continue
+
+        spec["network"]["address"] = address
+        post_creating(
+            config=config,
+            **dict(
+                hostname=spec.get("hostname"),
+                network=spec["network"]
+            )
+        )
+        click.echo(f"{spec['name']} is ready ({address})")
+    return specs
 
 def destroying_vm(config, vms, paralel=3, **kwargs):
-    specs = map(vm2dict, vms)
-    pool = multiprocessing.Pool(processes=paralel, initializer=use_config, initargs=(config,))
-    result = pool.map(multi_destroy_vm, specs)
-    return result
+    """
+        Destroy the virtual machines as a pipeline, each stage is done for all
+        the virtual machines at once:
+        1. The virtual machine properties are taken with a single call
+        2. The phpIPAM addresses are looked up concurrently, and each DNS zone is transferred once
+        3. The virtual machines are powered off and destroyed together (batched by the governor)
+        4. The phpIPAM addresses are released concurrently, the DNS records are removed
+           with a single update for each zone and the Chef nodes with a single bulk delete
+
+        The virtual machine which is not matched with its phpIPAM record is skipped, unless force is set
+        (then only the virtual machine is destroyed, its phpIPAM address, DNS record and Chef node are kept)
+
+        :return: List of the destroyed virtual machine specs
+    """
+    force = config.get("force", False)
+    vsphere_service = setup_service(config)
+
+    props = vsphere_service.describe_vms(vms, path_set=VM_DESTROY_PROPERTIES)
+    specs = [vm2dict(vm, props.get(vm._moId, {})) for vm in vms]
+
+    with ThreadPoolExecutor(max_workers=max(1, paralel)) as executor:
+        locating_ipaddr(config, specs)
+        locating_record(config, specs, executor)
+
+        for spec in specs:
+            if spec.get("error") and force:
+                spec["warning"] = spec.pop("error")
+
+        removable = [spec for spec in specs if not spec.get("error")]
+        governor = make_governor(config, paralel=paralel)
+        targets = [
+            [("host", spec["host"])] + [("datastore", datastore) for datastore in spec["datastores"]]
+            for spec in removable
+        ]
+        for batch in governor.batches(removable, targets):
+            results = vsphere_service.destroy_vms([spec["obj"] for spec in batch])
+            for spec in batch:
+                result = results.get(spec["obj"]._moId, "success")
+                if result != "success":
+                    spec["error"] = f"Unable to destroy virtual machine! ({result})"
+
+        destroyed = [spec for spec in removable if not spec.get("error")]
+        cleaning_vm(config, destroyed)
+
+    failed = [spec for spec in specs if spec.get("error")]
+    for spec in specs:
+        if spec.get("error") or spec.get("warning"):
+            click.echo(f"\n{spec['name']}: {spec.get('error') or spec.get('warning')}")
+
+    if failed and not destroyed:
+        err = RuntimeError(failed[0]["error"])
+        raise err
+
+    return [dict((key, value) for key, value in spec.items() if key != "obj") for spec in destroyed]
+
+def locating_ipaddr(config, specs):
+    """
+        Look up the phpIPAM address of the virtual machines concurrently (AsyncPHPIPAMService),
+        the first address which is registered is used
+    """
+    ipam_service = init_async_ipam_service(config["phpipam"])
+
+    async def lookup(address):
+        try:
+            return (await ipam_service.show_ipaddr(address=address))[0]
+        except phpipam.errors.NotFound:
+            return None
+
+    addresses = list(set(address for spec in specs for address in spec["network"]["addresses"]))
+    try:
+        ipaddrs = dict(zip(addresses, aio.run(aio.gather(*[lookup(address) for address in addresses]))))
+    finally:
+        ipam_service.close()
 
-def waiting_vm(specs, paralel=3):
-    addresses = [spec.get('network',{}).get('address') for spec in specs]
-    pool = multiprocessing.Pool(processes=paralel)
-    result = pool.map(wait_to_live, addresses)
+    for spec in specs:
+        ipaddr = next((ipaddrs[address] for address in spec["network"]["addresses"] if ipaddrs.get(address)), None)
+        if not ipaddr:
+            spec["error"] = "Unable to destroy virtual machine! (Network adapter is not running or Virtual machine not alive)"
+            continue
+
+        spec["network"] = dict(address=ipaddr.ip)
+        if spec["hostname"] != ipaddr.hostname:
+            # The address, DNS record and Chef node belong to another host,
+            # so they are never cleaned (force only destroy the virtual machine)
+            spec["error"] = f"Unable to destroy virtual machine! Virtual machine hostname and IPAM record are not match ({spec['hostname']}:{ipaddr.hostname})"
+            continue
+
+        spec["ipaddr"] = ipaddr
     return specs
 
+def locating_record(config, specs, executor):
+    """
+        Look up the DNS record of the virtual machines, each zone is transferred once (concurrently)
+    """
+    def transfer(zone):
+        zone_obj = ConfigFileProcessor.select_storage_for(f"dns.zones.{zone}", config)
+        try:
+            return init_dns_service(zone_obj).import_records()
+        except Exception:
+            if not config.get("force", False):
+                raise
+            return []
+
+    records = {}
+    for zone_records in executor.map(transfer, config["dns.zones"]["available"]):
+        for record in zone_records:
+            records.setdefault(record.get("content"), record)
+
+    for spec in specs:
+        ipaddr = spec.get("ipaddr")
+        record = records.get(ipaddr.ip) if ipaddr else None
+        if record:
+            spec["record"] = record
+            spec["fqdn"] = f"{record.get('name')}.{record.get('zone')}"
+    return specs
+
+def cleaning_vm(config, specs):
+    """
+        Release the phpIPAM addresses (concurrently with AsyncPHPIPAMService), remove the DNS records (a single update for each zone)
+        and delete the Chef nodes (a single bulk delete) of the destroyed virtual machines
+    """
+    ipam_service = init_async_ipam_service(config["phpipam"])
+
+    # The virtual machines are already destroyed, so the cleanup error is only reported
+    async def release(spec):
+        ipaddr = spec["ipaddr"]
+        try:
+            await ipam_service.release_ipaddr(ipaddr.ip, subnet_id=ipaddr.subnetId)
+        except Exception as exc:
+            spec["warning"] = f"Unable to release address {ipaddr.ip} ({exc})"
+
+    try:
+        aio.run(aio.gather(*[release(spec) for spec in specs if spec.get("ipaddr")]))
+    finally:
+        ipam_service.close()
+
+    zones = {}
+    for spec in specs:
+        if spec.get("record"):
+            zones.setdefault(spec["record"].get("zone"), []).append(spec)
+
+    for zone, zone_specs in zones.items():
+        dns_service = init_dns_service(config[f"dns.zones.{zone}"])
+        response, err = dns_service.remove_records([spec["record"] for spec in zone_specs])
+        if err:
+            for spec in zone_specs:
+                spec["warning"] = f"Unable to remove DNS record {spec['fqdn']} ({response})"
+
+    debootstraping_vms(config, [spec for spec in specs if spec.get("fqdn")])
+    return specs
+
+@stats.flushing
 def multi_create_vm(spec):
     if not spec.get("datastore") and not spec.get("datastore_cluster"):
         err = AttributeError("Datastore or Datastore are not set")
@@ -138,34 +753,26 @@ def multi_create_vm(spec):
     
     _network = spec.get("network")
 
-    ipam_obj = gconfig["phpipam"]
     zone_obj = gconfig[f"dns.zones.{_network.get('domain')}"]
 
     vsphere_service = setup_service(gconfig)
-    ipam_service = init_ipam_service(ipam_obj)
     dns_service = init_dns_service(zone_obj)
 
-
-    # Select VM Template
-    template = vsphere_service.use_template(
-        template_name=spec.get("template"), 
-        template_folder=spec.get("template_path")
-    )
-    # Select Network Device
-    network = vsphere_service.use_network(_network.get("name"))
-
-    # Select Destination Folder
-    folder = vsphere_service.use_folder(spec.get("folder"))
-
-    # Select Compute Resource
-    compute = vsphere_service.use_compute(spec.get("compute"))
-
-    # Select Storage if N/A, just use template storage
-    storage = vsphere_service.use_storage(spec.get("datastore"))
+    # Placement resources are resolved by the parent process (planning_vm),
+    # storage is None if N/A, just use template storage
+    plan = spec.get("plan")
+    resources = vsphere_service.use_plan(plan)
+    template = resources["template"]
+    network = resources["network"]
+    folder = resources["folder"]
+    compute = resources["compute"]
+    storage = resources["storage"]
+    clone_mode = plan["clone_mode"]
+    single_task = gconfig["vcenter"].get("single_task", False)
 
     # Setup the network configuration
-    subnet = ipam_service.show_subnet(cidr=_network.get("cidr"))
-    _network["subnet_id"] = subnet.id
+    subnet = plan["subnet"]
+    _network["subnet_id"] = subnet["id"]
     _network["fqdn"] = f"{spec.get('hostname')}.{_network.get('domain')}"
 
     network_config = dict(
@@ -174,21 +781,17 @@ def multi_create_vm(spec):
     )
 
     if not _network.get("dhcp"):
-        # Setup address if dhcp is not set
-        ipaddr = ipam_service.reserve_ipaddr(
-            subnet_id=subnet.id
-        ).data
-
-        _network["address"] = ipaddr
+        # Setup address if dhcp is not set, the address is reserved by the parent process (planning_vm)
+        ipaddr = _network["address"]
 
         network_config = dict(network_config,
             ipv4_address=ipaddr,
-            gateway_address=subnet.gateway.ip_addr,
-            subnet_mask=getattr(subnet.calculation, "Subnet netmask")
+            gateway_address=subnet["gateway"],
+            subnet_mask=subnet["netmask"]
         )
 
-    # Try/Except used for checking if virtual machine cloning task have an error, 
-    # will delete an IP Address on IPAM Server as well
+    # Try/Except used for checking if virtual machine cloning task have an error,
+    # the IP Address on IPAM Server is released by the parent process (failing_vm)
 
     try:
         clone_name = spec.get("name")
@@ -196,6 +799,10 @@ def multi_create_vm(spec):
 
         # Attributes for Virtual Machine Specification
         attributes = dict(
+            name=clone_name,
+            clone_mode=clone_mode,
+            snapshot=resources["snapshot"],
+            single_task=single_task,
             hostname=spec.get("hostname"),
             domain=_network.get("domain"),
             num_cpus=spec.get("num_cpus"),
@@ -209,10 +816,20 @@ def multi_create_vm(spec):
             storage=storage,
             network=network,
             compute=compute,
+            portgroup_key=plan["portgroup_key"],
+            switch_uuid=plan["switch_uuid"],
             **attributes
         )
 
-        if not storage and spec.get("datastore_cluster"):
+        if clone_mode == "instant":
+            # Instant clone is already running, the guest configure itself from guestinfo
+            vm = vsphere_service.instant_clone_vm(
+                name=clone_name,
+                source=template,
+                folder=folder,
+                clonespec=clonespec
+            )
+        elif not storage and spec.get("datastore_cluster"):
             vm = vsphere_service.clone_vm_with_sdrs(
                 name=clone_name, 
                 template=template, 
@@ -228,114 +845,40 @@ def multi_create_vm(spec):
                 clonespec=clonespec
             )
         
-        # VM Reconfiguring Task
-        configuring = vsphere_service.wait_for_task(
-            f"VM Reconfiguring {clone_name}",
-            vm.ReconfigVM_Task(spec=configspec)
-        )
-        
-        # VM Customizing Task
-        costumizing = vsphere_service.wait_for_task(
-            f"VM Customizing {clone_name}",
-            vm.CustomizeVM_Task(spec=customspec)
-        )
-
-        # VM PoweringOn Task
-        poweringon = vsphere_service.wait_for_task(
-            f"Powering On {clone_name}", 
-            vm.PowerOnVM_Task()
-        )
-        
-        while True:
-            address = vm.guest.ipAddress
-            if address is not None:
-                _network["address"] = vm.guest.ipAddress
-                break
+        if clone_mode != "instant" and not single_task:
+            # VM Reconfiguring Task
+            configuring = vsphere_service.wait_for_task(
+                f"VM Reconfiguring {clone_name}",
+                vm.ReconfigVM_Task(spec=configspec)
+            )
+            
+            # VM Customizing Task
+            costumizing = vsphere_service.wait_for_task(
+                f"VM Customizing {clone_name}",
+                vm.CustomizeVM_Task(spec=customspec)
+            )
 
-        post_creating(
-            config=gconfig, 
-            **dict(
-                hostname=spec.get("hostname"),
-                network=_network
+            # VM PoweringOn Task
+            poweringon = vsphere_service.wait_for_task(
+                f"Powering On {clone_name}", 
+                vm.PowerOnVM_Task()
             )
-        )
 
+        # The guest readiness are watched by the parent process (waiting_guest)
+        spec["vm"] = vm._moId
         spec["network"] = _network
 
     except Exception as exc:
-        ipam_service.release_ipaddr(
-            address=_network.get("address"),
-            subnet_id=_network.get("subnet_id")
-        )
         raise RuntimeError(exc)
     
     return spec
 
-def multi_destroy_vm(spec):
-    global gconfig
-
-    name = spec["name"]
-    uuid = spec["uuid"]
-    hostname = spec["hostname"]
-    addresses = spec["network"]["addresses"]
-
-    force = gconfig["force"]
-
-    try:
-        ipam_service = init_ipam_service(gconfig["phpipam"])
-        ipaddr = None
-        for address in addresses:
-            try:
-                result = ipam_service.show_ipaddr(address=address)
-            except phpipam.errors.NotFound:
-                continue
-            else:
-                ipaddr = result[0]
-                spec["network"] = dict(address=address)
-                break
-        
-        if not ipaddr:
-            err = ValueError("Unable to destroy virtual machine! (Network adapter is not running or Virtual machine not alive)")
-            raise err
-
-        if hostname != ipaddr.hostname:
-            err = ValueError(f"Unable to destroy virtual machine! Virtual machine hostname and IPAM record are not match ({hostname}:{ipaddr.hostname})")
-            raise err
-        
-        records = []
-        for zone in gconfig["dns.zones"]["available"]:
-            section = f"dns.zones.{zone}"
-            zone_obj = ConfigFileProcessor.select_storage_for(section, gconfig)
-            service = init_dns_service(zone_obj)
-            records.extend(service.import_records())
-
-        record = list(filter(lambda rec: rec.get('content') == ipaddr.ip, records))
-
-        ipam_service.release_ipaddr(ipaddr.ip, subnet_id=ipaddr.subnetId)
-        
-        if record:
-            record = record[0]
-            dns_service = init_dns_service(gconfig[f"dns.zones.{record.get('zone')}"])
-            dns_service.remove_record(
-                name=record.get('name'),
-                rtype=record.get('rtype')
-            )
-
-            spec["fqdn"] = f"{record.get('name')}.{record.get('zone')}"
-            debootstraping_vm(gconfig, spec)         
-    except Exception as err:
-        if not force:
-            raise err
-    finally:
-        vsphere_service = setup_service(gconfig)
-        task = vsphere_service.delete_vm(uuid=uuid)
-        return spec
-
 def bootstraping_vm(config, specs, paralel=3):
     pool = multiprocessing.Pool(processes=paralel, initializer=use_config, initargs=(config,))
     result = pool.map(multi_bootstrap_vm, specs)
     return result
 
+@stats.flushing
 def multi_bootstrap_vm(spec):
     global gconfig
 
@@ -373,22 +916,28 @@ def multi_bootstrap_vm(spec):
 
     return spec
 
-def debootstraping_vm(config, spec):
-    _fqdn = spec.get('fqdn')
-    knife_obj = config["knife"]
+def debootstraping_vms(config, specs):
+    """
+        Delete the Chef nodes of the virtual machines at once (a single bulk delete)
+    """
+    if not specs:
+        return specs
+
     kbootstrap = KnifeBootstrap(
-        debug=spec.get("debug", False),
-        show_err=spec.get('show_err', False)
+        debug=specs[0].get("debug", False),
+        show_err=specs[0].get("show_err", False)
     )
 
     try:
-        result = kbootstrap.delete(_fqdn)
+        result = kbootstrap.delete_many([spec.get("fqdn") for spec in specs])
     except:
-        spec["debootstrap"] = "ERROR"
+        status = "ERROR"
     else:
-        spec["debootstrap"] = "DONE"
+        status = "DONE"
 
-    return spec
+    for spec in specs:
+        spec["debootstrap"] = status
+    return specs
 
 def post_creating(config, **kwargs):
     # When creation virtual machine is success
@@ -481,6 +1030,8 @@ def make_summary(specs):
         click.echo(f"\tdatastore: { spec.get('datastore') or '<unset>'}")
         click.echo(f"\tdatastore_cluster: {spec.get('datastore_cluster') or '<unset>'}")
         click.echo(f"\tcompute: {spec.get('compute') or '<unset>'}")
+        click.echo(f"\tcompute_candidates: {', '.join(spec.get('compute_candidates') or []) or '<unset>'}")
+        click.echo(f"\tdatastore_candidates: {', '.join(spec.get('datastore_candidates') or []) or '<unset>'}")
         click.echo(f"\tnetwork: {spec.get('network',{}).get('name') or '<unset>'}")
         click.echo(f"\tnetwork.dhcp: {spec.get('network', {}).get('dhcp')}")
         click.echo(f"\tnetwork.cidr: {spec.get('network', {}).get('cidr') or '<unset>'}")
@@ -488,48 +1039,27 @@ def make_summary(specs):
         click.echo(f"\tnetwork.dns: {spec.get('network', {}).get('dns') or '<unset>'}")
         click.echo(f"\ttemplate: {spec.get('template') or '<unset>'}")
         click.echo(f"\ttemplate_path: {spec.get('template_path') or '<unset>'}")
+        click.echo(f"\tclone_mode: {spec.get('clone_mode') or 'full'}")
         click.echo("\n")
 
-def vm2dict(vm):
-    network = list(filter(lambda net: net.connected and net.deviceConfigId == 4000, vm.guest.net))
-    if not network:
-        err = ValueError("Unable to destroy virtual machine cause virtual machine is not running!")
-        raise err
+def vm2dict(vm, properties):
+    """
+        :param vm: Virtual machine object (vim.VirtualMachine)
+        :param properties: Virtual machine properties (VM_DESTROY_PROPERTIES)
+    """
+    network = list(filter(lambda net: net.connected and net.deviceConfigId == 4000, properties.get("guest.net") or []))
+    host = properties.get("runtime.host")
 
     return {
-        "uuid": vm.config.uuid,
-        "name": vm.name,
-        "hostname": vm.guest.hostName,
-        "network": dict(addresses=list(network[0].ipAddress))
+        "obj": vm,
+        "uuid": properties.get("config.uuid"),
+        "name": properties.get("name"),
+        "hostname": properties.get("guest.hostName"),
+        "host": host._moId if host else None,
+        "datastores": [datastore._moId for datastore in properties.get("datastore") or []],
+        "network": dict(addresses=list(network[0].ipAddress) if network else [])
     }
 
-def wait_to_live(ipaddr):
-    if ipaddr is None:
-        return
-        
-    temp = 0
-    MAX_THRESHOLD = 50
-
-    while True:
-
-        try:
-            output = subprocess.run(
-                f"ping -c 1 {ipaddr} > /dev/null",
-                shell=True,
-                check=True
-            ) 
-        except subprocess.CalledProcessError as exc:
-            pass
-        else:
-            if output.returncode != 0:
-                temp += 1
-                time.sleep(5)
-            else:
-                break
-        
-        if temp > MAX_THRESHOLD:
-            raise RuntimeError(f"Reached MAX TIMEOUT. Unable to reach {ipaddr}")
-
 def waiting_process(thread, title):
     start_t = time.time()
     for progress in thread.progress:
@@ -5,6 +5,10 @@ def init_vm_service(vcenter_obj):
     service = VSphereService(
         host=vcenter_obj.get("host"),
         port=vcenter_obj.get("port"),
-        ssl=vcenter_obj.get("ssl")
+        ssl=vcenter_obj.get("ssl"),
+        cache_dir=vcenter_obj.get("cache_dir"),
+        inventory_cache=vcenter_obj.get("inventory_cache", False),
+        page_size=vcenter_obj.get("page_size") or 1000,
+        reuse_session=vcenter_obj.get("reuse_session", False)
     )
     return service
\ No newline at end of file
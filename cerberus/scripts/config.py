@@ -31,7 +31,28 @@ class ConfigSectionSchema(object):
         log = Param(type=click.Path())
         log_format = Param(type=str)
         zfill = Param(type=bool)
+        cache_dir = Param(type=click.Path())
+        inventory_cache = Param(type=bool)
+        page_size = Param(type=int)
+        reuse_session = Param(type=bool)
+        single_task = Param(type=bool)
+        guest_timeout = Param(type=int)
+        host_limit = Param(type=int)
+        datastore_limit = Param(type=int)
     
+    @matches_section("vcenter.datacenters")
+    class VCenterDatacentersAvailable(SectionSchema):
+        available = Param(type=str, multiple=True)
+
+    @matches_section("vcenter.datacenters.*")
+    class VCenterDatacenters(SectionSchema):
+        host = Param(type=str)
+        port = Param(type=int)
+        user = Param(type=str)
+        pwd = Param(type=str)
+        ssl = Param(type=bool)
+        datacenter = Param(type=str)
+
     @matches_section("vcenter.environments")
     class VCenterEnvironmentsAvailable(SectionSchema):
         available = Param(type=str, multiple=True)
@@ -59,6 +80,9 @@ class ConfigSectionSchema(object):
         folder = Param(type=str)
         template = Param(type=str)
         template_path = Param(type=str)
+        clone_mode = Param(type=click.Choice(["full", "linked", "instant"]))
+        compute_candidates = Param(type=str, multiple=True)
+        datastore_candidates = Param(type=str, multiple=True)
 
     @matches_section("vcenter.categories.*")
     class VCenterCategory(SectionSchema):
@@ -72,6 +96,9 @@ class ConfigSectionSchema(object):
         compute = Param(type=str)
         template = Param(type=str)
         folder = Param(type=str)
+        clone_mode = Param(type=click.Choice(["full", "linked", "instant"]))
+        compute_candidates = Param(type=str, multiple=True)
+        datastore_candidates = Param(type=str, multiple=True)
 
     @matches_section("knife")
     class Knife(SectionSchema):
@@ -98,6 +125,10 @@ class ConfigSectionSchema(object):
         endpoint = Param(type=str)
         user = Param(type=str)
         pwd = Param(type=str)
+        pool_size = Param(type=int)
+        token_cache = Param(type=bool)
+        subnet_cache_ttl = Param(type=int)
+        cache_dir = Param(type=click.Path())
 
     @matches_section("dns")
     class DNS(SectionSchema):
@@ -122,6 +153,8 @@ class ConfigFileProcessor(ConfigFileReader):
     config_section_schemas = [
         ConfigSectionSchema.Defaults,
         ConfigSectionSchema.Vcenter,
+        ConfigSectionSchema.VCenterDatacentersAvailable,
+        ConfigSectionSchema.VCenterDatacenters,
         ConfigSectionSchema.VCenterEnvironmentsAvailable,
         ConfigSectionSchema.VCenterNetworksComponent,
         ConfigSectionSchema.VCenterEnvironments,
@@ -80,7 +80,7 @@ class BeautifyFormat(object):
 
     @staticmethod
     def get_length(d):
-        if d and isinstance(d, list):
+        if d and isinstance(d, (list, tuple)):
             return len(str(d[0]))
         return len(str(d))
 
@@ -111,11 +111,23 @@ class BeautifyFormat(object):
         result = [" ".join(map(cls._get(padding), zip(ar, widths))) for ar in arr]
         return result
 
+    @classmethod
+    def from_stream(cls, data, headers=[], attr=[], widths=[], padding=5):
+        """  
+            Same like from_dict(), but the column widths are fixed,
+            so every row could be yielded as soon as the data arrived
+        """
+        widths = list(widths) + [len(header) for header in headers[len(widths):]]
+        yield " ".join(map(cls._get(padding), zip(headers, widths)))
+        for dict_ in data:
+            row = [dict_.get(at, '-') for at in attr]
+            yield " ".join(map(cls._get(padding), zip(row, widths)))
+
     @staticmethod
     def _get(padding):
         def func(data):
             val, width = data
-            if val and isinstance(val, list):
+            if val and isinstance(val, (list, tuple)):
                 val = val[0]
 
             return f"{val if val else '-':<{width+padding}}"
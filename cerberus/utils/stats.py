@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import time
+import uuid
+import bisect
+import functools
+import threading
+import contextlib
+from urllib.parse import urlparse
+
+# Upper bound (seconds) of the latency histogram buckets, the last bucket is unbounded
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+class StatsRecorder(object):
+    """ Stats Recorder Class
+
+    This class count the calls and record the latency histogram of the calls
+    to the external services (vSphere SOAP, phpIPAM HTTP and DNS), grouped by
+    category and method/endpoint name.
+
+    >>  Note: The recorder is process-wide. The pool workers (forked from the parent)
+              flush their stats to flush_dir after each task, and the parent
+              merges them on collect().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.flush_dir = None
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def check_pid(self):
+        # The stats inherited from the parent (forked) belong to the parent
+        if self.pid != os.getpid():
+            self.reset()
+
+    def enable(self, flush_dir):
+        """
+            :param flush_dir: Directory for the stats of the pool workers
+        """
+        os.makedirs(flush_dir, mode=0o700, exist_ok=True)
+        self.flush_dir = flush_dir
+        self.enabled = True
+
+    def record(self, category, name, elapsed, error=False):
+        self.check_pid()
+        with self.lock:
+            entry = self.entries.get((category, name))
+            if entry is None:
+                entry = self.entries[(category, name)] = dict(
+                    count=0, errors=0, total=0.0, max=0.0,
+                    buckets=[0] * (len(BUCKETS) + 1)
+                )
+            entry["count"] += 1
+            entry["errors"] += 1 if error else 0
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            entry["buckets"][bisect.bisect_left(BUCKETS, elapsed)] += 1
+
+    @contextlib.contextmanager
+    def measure(self, category, name):
+        """
+            Measure the latency of the block
+            >>> with recorder.measure("phpipam", "GET /subnets/{}/"):
+                    make_request(...)
+        """
+        if not self.enabled:
+            yield
+            return
+
+        error = False
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(category, name, time.perf_counter() - start, error=error)
+
+    def merge(self, entries):
+        """
+            Merge the stats from to_list()
+        """
+        with self.lock:
+            for item in entries:
+                key = (item["category"], item["name"])
+                entry = self.entries.setdefault(key, dict(
+                    count=0, errors=0, total=0.0, max=0.0,
+                    buckets=[0] * (len(BUCKETS) + 1)
+                ))
+                entry["count"] += item["count"]
+                entry["errors"] += item["errors"]
+                entry["total"] += item["total"]
+                entry["max"] = max(entry["max"], item["max"])
+                entry["buckets"] = [a + b for a, b in zip(entry["buckets"], item["buckets"])]
+
+    def flush(self):
+        """
+            Write the stats to flush_dir and reset the recorder (used by the pool workers)
+        """
+        if not self.enabled or not self.flush_dir:
+            return
+
+        self.check_pid()
+        with self.lock:
+            entries = self.to_list()
+            self.entries = {}
+
+        if entries:
+            path = os.path.join(self.flush_dir, f"{os.getpid()}-{uuid.uuid4().hex}.json")
+            with open(path, "w") as fileused:
+                json.dump(entries, fileused)
+
+    def collect(self):
+        """
+            Merge the flushed stats of the pool workers
+        """
+        if not self.flush_dir or not os.path.isdir(self.flush_dir):
+            return
+
+        for name in os.listdir(self.flush_dir):
+            path = os.path.join(self.flush_dir, name)
+            try:
+                with open(path, "r") as fileused:
+                    self.merge(json.load(fileused))
+                os.remove(path)
+            except (OSError, ValueError):
+                continue
+
+    def to_list(self):
+        """
+            :return: List of stats for each category and name
+            :rtype: list
+        """
+        return [
+            dict(
+                category=category,
+                name=name,
+                count=entry["count"],
+                errors=entry["errors"],
+                total=entry["total"],
+                max=entry["max"],
+                buckets=list(entry["buckets"]),
+                p50=percentile(entry["buckets"], 0.5, maximum=entry["max"]),
+                p95=percentile(entry["buckets"], 0.95, maximum=entry["max"])
+            ) for (category, name), entry in sorted(self.entries.items(), key=lambda item: -item[1]["total"])
+        ]
+
+def percentile(buckets, rank, maximum=0.0):
+    """
+        Estimate the percentile from the histogram (the upper bound of the bucket),
+        the percentile never exceed the maximum latency
+    """
+    count = sum(buckets)
+    if not count:
+        return 0.0
+
+    seen = 0
+    for index, value in enumerate(buckets):
+        seen += value
+        if seen >= rank * count and index < len(BUCKETS):
+            return min(BUCKETS[index], maximum)
+    return maximum
+
+def endpoint(url):
+    """
+        Normalize the url path to the endpoint name, the identifiers are replaced
+        >>> endpoint("https://ipam.local/api/cerberus/subnets/12/addresses/first_free/")
+        '/api/cerberus/subnets/{}/addresses/first_free/'
+    """
+    parts = urlparse(url).path.split("/")
+    return "/".join("{}" if re.match(r"^[\d.:]+(%2F\d+)?$", part) else part for part in parts)
+
+def instrument_stub(stub):
+    """
+        Record every SOAP call (method invocation and property access) of the pyVmomi stub
+    """
+    if not recorder.enabled or getattr(stub, "_cerberus_stats", False):
+        return stub
+
+    invoke_method = stub.InvokeMethod
+    invoke_accessor = stub.InvokeAccessor
+
+    def InvokeMethod(mo, info, args, *rest, **kwargs):
+        with recorder.measure("vsphere", f"{mo.__class__.__name__}.{info.name}"):
+            return invoke_method(mo, info, args, *rest, **kwargs)
+
+    def InvokeAccessor(mo, info, *rest, **kwargs):
+        with recorder.measure("vsphere", f"{mo.__class__.__name__}.{info.name} (property)"):
+            return invoke_accessor(mo, info, *rest, **kwargs)
+
+    stub.InvokeMethod = InvokeMethod
+    stub.InvokeAccessor = InvokeAccessor
+    stub._cerberus_stats = True
+    return stub
+
+def flushing(func):
+    """
+        Decorator for the pool task, flush the stats of the worker after the task is done
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            recorder.flush()
+    return wrapper
+
+recorder = StatsRecorder()
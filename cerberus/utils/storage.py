@@ -0,0 +1,55 @@
+import os
+import re
+import json
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cerberus")
+
+def safe_name(*parts):
+    """
+        Build a filesystem safe name from the given parts
+        >>> safe_name("vsphere-01.production.local", "DC-PRODUCTION")
+        'vsphere-01.production.local-DC-PRODUCTION'
+    """
+    name = "-".join(str(part) for part in parts if part)
+    return re.sub(r"[^\w.-]", "_", name)
+
+def cache_path(*parts, cache_dir=None):
+    """
+        Resolve a path inside the cerberus cache directory,
+        the parent directory will be created with owner-only permission
+
+        :param parts: Path parts relative to the cache directory
+        :param cache_dir: Cache directory (default: ~/.cerberus)
+        :return: Absolute path
+    """
+    base = os.path.expanduser(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    path = os.path.join(base, *parts)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    return path
+
+def read_json(path):
+    """
+        Read a JSON file, return None if the file is not exist or not a valid JSON
+    """
+    try:
+        with open(path, "r") as fileused:
+            return json.load(fileused)
+    except (OSError, ValueError):
+        return None
+
+def write_json(path, data):
+    """
+        Write a JSON file atomically with owner-only permission (0600),
+        so the other user on the host can not read the content
+    """
+    temp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as fileused:
+        json.dump(data, fileused)
+    os.replace(temp, path)
+
+def remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,11 +1,18 @@
 
+import time
 import atexit
 from . import (
     errors,
     helpers,
     tools
 )
-from pyVmomi import vim
+from .inventory import InventoryCache
+from .paths import PathCache
+from .placement import PlacementEngine
+from .session import SessionStore
+from .records import VMRecord
+from cerberus.utils import stats
+from pyVmomi import vim, vmodl
 from pyVim.connect import SmartConnect, SmartConnectNoSSL, Disconnect
 
 def network_check(vm):
@@ -16,15 +23,7 @@ def network_check(vm):
     :return: Return Virtual Machine object itself with already change to different format for the network variable
     """
 
-    found = False
-    for net in vm.get("guest.net"):
-        if net.connected and net.deviceConfigId == 4000:
-            vm["guest.net"] = list(net.ipAddress)
-            found = True
-            break
-        
-    if not found:
-        vm["guest.net"] = None
+    vm["guest.net"] = helpers.guest_addresses(vm.get("guest.net"))
     return vm
 
 def filtering_by(name=None, hostname=None, ipaddr=None):
@@ -41,22 +40,22 @@ def filtering_by(name=None, hostname=None, ipaddr=None):
 
     def _fromlist(comparator, target):
         for c in comparator:
-            if c in target:
+            if str.lower(c) in target:
                 return True
         return False
     
     def filtering(vm):
         valid = False
         if name:
-            valid = _fromlist(name, str.lower(vm.get("name"))) \
-                if isinstance(name, (list, tuple,)) else str.lower(name) in str.lower(vm.get("name"))  
+            valid = _fromlist(name, str.lower(vm.get("name") or "")) \
+                if isinstance(name, (list, tuple,)) else str.lower(name) in str.lower(vm.get("name") or "")
 
         elif hostname:
-            valid = _fromlist(hostname, str.lower(vm.get("guest.hostName", ""))) \
-                if isinstance(hostname, (list, tuple,)) else str.lower(hostname) in str.lower(vm.get("guest.hostName", ""))
+            valid = _fromlist(hostname, str.lower(vm.get("guest.hostName") or "")) \
+                if isinstance(hostname, (list, tuple,)) else str.lower(hostname) in str.lower(vm.get("guest.hostName") or "")
 
         elif ipaddr:
-            valid = ipaddr in vm.get("guest.net", "")
+            valid = ipaddr in (vm.get("guest.net") or [])
 
         return valid
     
@@ -70,29 +69,82 @@ class VSphereService(object):
 
     """
 
-    def __init__(self, host, port=443, ssl=False, *args, **kwargs):
+    VM_PROPERTIES = [
+        "name", 
+        "config.uuid", 
+        "config.hardware.numCPU",
+        "config.hardware.memoryMB", 
+        "config.guestFullName", 
+        "config.guestId", 
+        "config.version", 
+        "guest.net", 
+        "guest.guestState", 
+        "guest.hostName",
+        "runtime.powerState"
+    ]
+
+    GUEST_PROPERTIES = [
+        "guest.ipAddress",
+        "guest.net",
+        "guest.toolsRunningStatus"
+    ]
+
+    CLONE_MODES = ["full", "linked", "instant"]
+
+    # Snapshot of the template which is managed for linked clone
+    LINKED_CLONE_SNAPSHOT = "cerberus-linked-clone"
+
+    def __init__(self, host, port=443, ssl=False, cache_dir=None, inventory_cache=False, page_size=1000, reuse_session=False, *args, **kwargs):
         """  
             Constructor
 
             :param host: vSphere/vCenter host to be solved (ip address or domain name)
             :param port: vSphere/vCenter Server port number
             :param ssl: only for SSL
+            :param cache_dir: Cache directory for the local data (default: ~/.cerberus)
+            :param inventory_cache: Use the local inventory snapshot for lookup virtual machines
+            :param page_size: Maximum number of objects for each page on property collection
+            :param reuse_session: Save the session locally and reuse it on the next connection
+                (always set with inventory_cache, the snapshot is bound to the session)
         """
         self.host = host
         self.port = port
         self.ssl = ssl
+        self.cache_dir = cache_dir
+        self.inventory_cache = inventory_cache
+        self.page_size = page_size
+        # The inventory snapshot only fetch the changes on the same session (PropertyCollector),
+        # on a new session the snapshot is loaded from scratch, so the session has to be reused
+        self.reuse_session = reuse_session or inventory_cache
+        self.session_store = None
+        self._inventory = None
+        self._paths = None
 
     def connect(self, user, pwd):
         """  
             Connect method
             This method will make a connection to the vSphere/vCenter host using
             user and password. After connection established, object saved the service instance and 
-            also content object for service instance
+            also content object for service instance.
+            >>  If reuse_session is set, a live session from the session store will be used
+                instead of making a new one, and the new session are saved to the session store.
 
             :param user: User credential
             :param pwd: Password credential
             :return: vim.ServiceInstance
         """
+        store = None
+        if self.reuse_session:
+            store = SessionStore(host=self.host, port=self.port, user=user, cache_dir=self.cache_dir)
+            service_instance, content = store.load(ssl_verify=self.ssl)
+            if service_instance:
+                stats.instrument_stub(service_instance._stub)
+                atexit.register(helpers.get_view_manager(content).destroy)
+                self.session_store = store
+                self.service_instance = service_instance
+                self.content = content
+                return service_instance
+
         try:
             if self.ssl:
                 service_instance = SmartConnect(
@@ -108,7 +160,14 @@ class VSphereService(object):
                     host=self.host,
                     port=self.port
                 )
-            atexit.register(Disconnect, service_instance)
+
+            # Saved session should stay alive after the process is done,
+            # but the views of the process are not needed anymore
+            if store:
+                store.save(service_instance)
+                atexit.register(helpers.get_view_manager(service_instance.content).destroy)
+            else:
+                atexit.register(Disconnect, service_instance)
         except BlockingIOError:
             err = errors.ServiceUnavailable(
                 f"Service unavailable. Whether unresolved name [{self.host}] or port connection problem"
@@ -121,6 +180,8 @@ class VSphereService(object):
             err = errors.TaskError(f"Unidentified Error ({e.__class__.__name__})")
             raise err
         else:
+            stats.instrument_stub(service_instance._stub)
+            self.session_store = store
             self.service_instance = service_instance
             self.content = self.service_instance.RetrieveContent()
             return service_instance
@@ -128,13 +189,17 @@ class VSphereService(object):
     def disconnect(self):
         """  
             Disconnect method
-            Literally this method will excuted automatically if the process is done.
+            Literally this method will excuted automatically if the process is done,
+            unless the session is saved to the session store.
 
             :return: Nothing
             :rtype: None
         """
         try:
+            self.views.destroy()
             Disconnect(self.service_instance)
+            if self.session_store:
+                self.session_store.clear()
         except:
             pass
 
@@ -161,10 +226,50 @@ class VSphereService(object):
         """
         try:
             self.datacenter_obj = helpers.get_datacenter(content=self.content, name=name)
+            self._inventory = None
+            self._paths = None
         except AttributeError:
             err = errors.SessionError("No connection established, get a connection first then initialize datacenter")
             raise err
 
+    @property
+    def inventory(self):
+        """  
+            Getter Inventory attribute
+            :return: Inventory snapshot of the selected datacenter
+            :rtype: InventoryCache
+        """
+        if self._inventory is None:
+            self._inventory = InventoryCache(
+                self.service_instance,
+                host=self.host,
+                datacenter=self.datacenter_obj,
+                path_set=self.__class__.VM_PROPERTIES,
+                cache_dir=self.cache_dir,
+                page_size=self.page_size
+            )
+        return self._inventory
+
+    @property
+    def views(self):
+        """  
+            Getter Views attribute
+            :return: Container view manager of the session
+            :rtype: ViewManager
+        """
+        return helpers.get_view_manager(self.content)
+
+    @property
+    def paths(self):
+        """  
+            Getter Paths attribute
+            :return: Folder and compute path cache of the selected datacenter
+            :rtype: PathCache
+        """
+        if self._paths is None:
+            self._paths = PathCache(self.content, datacenter=self.datacenter_obj)
+        return self._paths
+
     def clone_vm(self, name, template, folder, clonespec, **kwargs):
         """
             Create virtual machine method
@@ -181,7 +286,71 @@ class VSphereService(object):
         cloning = self.__class__.wait_for_task(f"VM Cloning {name}", task, **kwargs)
         return cloning.info.result
 
+    def instant_clone_vm(self, name, source, folder, clonespec, **kwargs):
+        """
+            Create virtual machine method with instant clone (vSphere 6.7 or later),
+            the new virtual machine is forked from the running state of the source,
+            so it is already powered on and no guest customization are applied
+            :param name: Virtual machine name
+            :param source: Powered on virtual machine to be forked (vim.VirtualMachine)
+            :param folder: Destionation folder for the virtual machine object (vim.Folder)
+            :param clonespec: Attribute for instant cloning function (vim.vm.InstantCloneSpec)
+
+            :return: Virtual machine object
+            :rtype: vim.VirtualMachine
+        """
+        clonespec.location.folder = folder
+        task = source.InstantClone_Task(spec=clonespec)
+        cloning = self.__class__.wait_for_task(f"VM Instant Cloning {name}", task, **kwargs)
+        return cloning.info.result
+
     def clone_vm_with_sdrs(self, name, template, folder, clonespec, dscluster, **kwargs):
+        sps = self.make_storage_placementspec(name, template, folder, clonespec, dscluster)
+
+        srm = self.content.storageResourceManager
+        rec = srm.RecommendDatastores(storageSpec=sps)
+        key = rec.recommendations[0].key
+        task = srm.ApplyStorageDrsRecommendation_Task(key=key)
+
+        cloning = self.__class__.wait_for_task(f"VM Cloning {name}", task, **kwargs)
+        return cloning.info.result.vm
+
+    def recommend_datastores(self, name, template, folder, clonespec, dscluster):
+        """
+            Ask Storage DRS once for the placement of a clone in the datastore cluster,
+            the recommendations are not applied, only the destination datastores are taken
+            so the replicas of a batch could be spread across the datastores
+
+            :param name: Virtual machine name
+            :param template: Template virtual machine to be used (vim.VirtualMachine)
+            :param folder: Destionation folder for the virtual machine object (vim.Folder)
+            :param clonespec: Attribute for cloning function (vim.CloneSpec)
+            :param dscluster: Datastore Cluster Name
+            :return: List of datastore (vim.Datastore) in the recommendation order
+            :rtype: list
+        """
+        sps = self.make_storage_placementspec(name, template, folder, clonespec, dscluster)
+        rec = self.content.storageResourceManager.RecommendDatastores(storageSpec=sps)
+
+        datastores = []
+        for recommendation in rec.recommendations:
+            for action in recommendation.action:
+                destination = getattr(action, "destination", None)
+                if destination is not None and destination not in datastores:
+                    datastores.append(destination)
+        return datastores
+
+    def make_storage_placementspec(self, name, template, folder, clonespec, dscluster):
+        """
+            Storage DRS Placement Specification
+            :name str
+            :template vim.VirtualMachine
+            :folder vim.Folder
+            :clonespec vim.vm.CloneSpec
+            :dscluster str (Datastore Cluster Name)
+
+            :return vim.storageDrs.StoragePlacementSpec
+        """
         if dscluster is None:
             err = ValueError("Datastore cluster can not be null")
             raise err
@@ -204,14 +373,112 @@ class VSphereService(object):
         sps.vm = template
         sps.folder = folder
         sps.type = "clone"
+        return sps
 
-        srm = self.content.storageResourceManager
-        rec = srm.RecommendDatastores(storageSpec=sps)
-        key = rec.recommendations[0].key
-        task = srm.ApplyStorageDrsRecommendation_Task(key=key)
+    def power_vms(self, vms, action, **kwargs):
+        """
+            Power operation for many virtual machines at once
+            >>  start will use Datacenter.PowerOnMultiVM_Task, stop and restart will submit
+                the task of each virtual machine together, then all the tasks are waited together.
+            :param vms: List of virtual machine object (vim.VirtualMachine)
+            :param action: Power operation (start, stop or restart)
 
-        cloning = self.__class__.wait_for_task(f"VM Cloning {name}", task, **kwargs)
-        return cloning.info.result.vm
+            :return: The result of each virtual machine (keyed by managed object id)
+            :rtype: dict
+        """
+        results = {}
+        tasks = {}
+        if action == "start":
+            # Let DRS place and power on the virtual machines without manual recommendations
+            option = vim.option.OptionValue(key="OverrideAutomationLevel", value=True)
+            task = self.datacenter_obj.PowerOnMultiVM_Task(vm=vms, option=[option])
+            powering = self.__class__.wait_for_task("Powering On VMs", task, **kwargs)
+            result = powering.info.result
+            for attempted in result.attempted or []:
+                tasks[attempted.vm._moId] = attempted.task
+            for not_attempted in result.notAttempted or []:
+                results[not_attempted.vm._moId] = not_attempted.fault.msg or not_attempted.fault.__class__.__name__
+
+        elif action == "stop":
+            for vm in vms:
+                tasks[vm._moId] = vm.PowerOffVM_Task()
+
+        elif action == "restart":
+            for vm in vms:
+                try:
+                    vm.RebootGuest()
+                    results[vm._moId] = "success"
+                except vmodl.MethodFault:
+                    # Guest reboot need VMware tools, so just reset the virtual machine
+                    tasks[vm._moId] = vm.ResetVM_Task()
+        else:
+            err = ValueError(f"Power operation ({action}) are not supported")
+            raise err
+
+        results.update(self.run_tasks(f"Powering VMs ({action})", tasks, **kwargs))
+        return results
+
+    def destroy_vms(self, vms, **kwargs):
+        """
+            Destroy many virtual machines at once
+            >>  The powered on virtual machines are powered off together, then the destroy tasks
+                of all the virtual machines are submitted together and waited together.
+            :param vms: List of virtual machine object (vim.VirtualMachine)
+
+            :return: The result of each virtual machine (keyed by managed object id)
+            :rtype: dict
+        """
+        props = self.describe_vms(vms, path_set=["runtime.powerState"])
+
+        results = {}
+        tasks = {}
+        for vm in vms:
+            if props.get(vm._moId, {}).get("runtime.powerState") != "poweredOn":
+                continue
+            try:
+                tasks[vm._moId] = vm.PowerOffVM_Task()
+            except vmodl.MethodFault as exc:
+                results[vm._moId] = exc.msg or exc.__class__.__name__
+        results.update(self.run_tasks("Powering Off VMs", tasks, **kwargs))
+
+        tasks = {}
+        for vm in vms:
+            if results.get(vm._moId, "success") != "success":
+                continue
+            try:
+                tasks[vm._moId] = vm.Destroy_Task()
+            except vmodl.MethodFault as exc:
+                results[vm._moId] = exc.msg or exc.__class__.__name__
+        results.update(self.run_tasks("Destroying VMs", tasks, **kwargs))
+        return results
+
+    @classmethod
+    def run_tasks(cls, name, tasks, **kwargs):
+        """
+            Wait for the tasks together (wait_for_tasks()) without raising the task error
+
+            :param name: Task name identifier
+            :param tasks: Dictionary of vCenter/vSphere task object (vim.Task, None if done without task)
+            :return: The result of each task, "success" or the error message (same keys with the tasks)
+            :rtype: dict
+        """
+        states = cls.wait_for_tasks(
+            name,
+            [task for task in tasks.values() if task],
+            raise_on_error=False,
+            **kwargs
+        )
+        states = dict((task._moId, state) for task, state in states)
+
+        results = {}
+        for key, task in tasks.items():
+            if task is None:
+                results[key] = "success"
+            elif states.get(task._moId) == vim.TaskInfo.State.success:
+                results[key] = "success"
+            else:
+                results[key] = task.info.error.msg if task.info.error else "error"
+        return results
 
     def delete_vm(self, vm=None, uuid=None, name=None):
         """
@@ -257,15 +524,7 @@ class VSphereService(object):
             :return: A yield process from utility function (helpers.wait_for_task())
             :rtype: Generator
         """
-        callbacks = {}
-        if on_queued:
-            callbacks["queued"] = on_queued
-        if on_success:
-            callbacks["success"] = on_success
-        if on_running:
-            callbacks["running"] = on_running
-        if on_error:
-            callbacks["error"] = on_error
+        callbacks = cls._callbacks(on_queued, on_success, on_running, on_error)
 
         result = None
         try:
@@ -277,6 +536,48 @@ class VSphereService(object):
         else:
             return result
 
+    @classmethod
+    def wait_for_tasks(cls, name, tasks, on_queued=None, on_success=None, on_running=None, on_error=None, raise_on_error=True, *args, **kwargs):
+        """
+            Wait for many tasks method.
+            >>  Same like wait_for_task(), but all the tasks are watched together.
+
+            :param name: Task name identifier
+            :param tasks: List of vCenter/vSphere task object (vim.Task) 
+            :param on_queued: Callback for queued process
+            :param on_success: Callback for success process
+            :param on_running: Callback for running process
+            :param on_error: Callback for error process
+            :param raise_on_error: Raise TaskError when one of the tasks get error
+
+            :return: List of task and its final state, the order are same with the given tasks
+            :rtype: list
+        """
+        tasks = list(tasks)
+        callbacks = cls._callbacks(on_queued, on_success, on_running, on_error)
+
+        states = {}
+        try:
+            for task, state in helpers.wait_for_tasks(tasks, callbacks, *args, raise_on_error=raise_on_error, **kwargs):
+                states[task._moId] = state
+        except Exception as e:
+            err = errors.TaskError(f"{name} task get error ({str(e)})")
+            raise err
+
+        return [(task, states.get(task._moId)) for task in tasks]
+
+    @staticmethod
+    def _callbacks(on_queued=None, on_success=None, on_running=None, on_error=None):
+        callbacks = {}
+        if on_queued:
+            callbacks["queued"] = on_queued
+        if on_success:
+            callbacks["success"] = on_success
+        if on_running:
+            callbacks["running"] = on_running
+        if on_error:
+            callbacks["error"] = on_error
+        return callbacks
 
     def lookup_vms(self, name=None, hostname=None, ipaddr=None):
         """  
@@ -284,39 +585,34 @@ class VSphereService(object):
             >>  This method for doing a more fast process to lookup all virtual machine in
                 selected datacenter of vSphere/vCenter with given parameter, if no parameter selected
                 the result will give all the virtual machine.
+            >>  If inventory cache is enabled, the result will be answered from the local snapshot
+                after the changes since the last version are fetched, the search use the secondary
+                indexes of the snapshot (hash on ip address, n-gram on name and hostname).
+                Otherwise the virtual machines are retrieved page by page, so the result
+                could be consumed while the next pages are not retrieved yet.
             
             :param name: Virtual machine name
             :param hostname: Virtual machine hostname
             :param ipaddr: Virtual machine ip address
-            :return: A list of virtual machine
-            :rtype: Filter object
-        """
-        vm_properties = [
-            "name", 
-            "config.uuid", 
-            "config.hardware.numCPU",
-            "config.hardware.memoryMB", 
-            "config.guestFullName", 
-            "config.guestId", 
-            "config.version", 
-            "guest.net", 
-            "guest.guestState", 
-            "guest.hostName",
-            "runtime.powerState"
-        ]
-        view = tools.get_container_view(
-            self.service_instance,
-            container=self.datacenter_obj.vmFolder,
-            obj_type=[vim.VirtualMachine]
-        )
-        vm_data = tools.collect_properties(
+            :return: A list of virtual machine record (VMRecord)
+            :rtype: Iterator
+        """
+        if self.inventory_cache:
+            vm_data = self.inventory.refresh()
+            if name or hostname or ipaddr:
+                vm_data = self.inventory.index.search(name=name, hostname=hostname, ipaddr=ipaddr)
+            return iter(vm_data)
+
+        view = self.views.get(self.datacenter_obj.vmFolder, [vim.VirtualMachine])
+        vm_data = tools.iter_properties(
             self.service_instance, 
             view_ref=view,
             obj_type=vim.VirtualMachine, 
-            path_set=vm_properties,
-            include_mors=True
+            path_set=self.__class__.VM_PROPERTIES,
+            include_mors=True,
+            page_size=self.page_size
         )
-        vm_data = map(network_check, vm_data)
+        vm_data = map(VMRecord.from_properties, vm_data)
         if name:
             vm_data = filter(filtering_by(name=name), vm_data)
         elif hostname:
@@ -416,7 +712,11 @@ class VSphereService(object):
             :storage vim.Datastore
             :network vim.DistributedVirtualPortgroup
             :compute vim.ClusterComputeResource or vim.ResourcePool
-            :kwargs (dhcp: bool, hostname: str, domain: str, specification: dict, network_config: dict)
+            :kwargs (
+                dhcp: bool, hostname: str, domain: str, specification: dict, network_config: dict,
+                portgroup_key: str, switch_uuid: str, name: str, clone_mode: str, snapshot: vim.vm.Snapshot,
+                single_task: bool
+            )
             :specification (num_cpus: int, memory: int)
             :network_config (
                 ipv4_address: str, gateway_address: str, 
@@ -426,9 +726,17 @@ class VSphereService(object):
             :return 
                 vm_configspec vim.ConfigSpec
                 vm_customspec vim.vm.customization.Specification
-                vim.CloneSpec
+                vim.CloneSpec (vim.vm.InstantCloneSpec for instant clone mode)
+
+            >>  If single_task is set, the config and customization specifications are
+                included in the CloneSpec with power on, so the clone task create
+                the virtual machine ready to use without the other tasks
         """
-        nic = self.make_nic(network)
+        nic = self.make_nic(
+            network,
+            portgroup_key=kwargs.get("portgroup_key"),
+            switch_uuid=kwargs.get("switch_uuid")
+        )
         configspec = self.make_vm_configspec(
             num_cpus=kwargs.get("num_cpus", 1), 
             memory=kwargs.get("memory", 1024), 
@@ -448,26 +756,54 @@ class VSphereService(object):
             vm_identity=identity
         )
 
+        clone_mode = kwargs.get("clone_mode") or "full"
         relocatespec = self.make_vm_relocatespec(
             resource_pool=compute, 
-            datastore=storage
-        )
-        clonespec = self.make_vm_clonespec(
-            vm_relocatespec=relocatespec
+            datastore=storage,
+            linked=clone_mode == "linked"
         )
+
+        if clone_mode == "instant":
+            # Instant clone could not be customized, the network configuration
+            # are passed to the guest as guestinfo variables instead
+            relocatespec.deviceChange = [nic]
+            clonespec = self.make_vm_instantclonespec(
+                name=kwargs.get("name"),
+                vm_relocatespec=relocatespec,
+                guestinfo=self.make_guestinfo(
+                    hostname=kwargs.get("hostname"),
+                    domainname=kwargs.get("domain"),
+                    dhcp=kwargs.get("dhcp", False),
+                    **kwargs.get("network_config")
+                )
+            )
+        else:
+            clonespec = self.make_vm_clonespec(
+                vm_relocatespec=relocatespec,
+                snapshot=kwargs.get("snapshot")
+            )
+            if kwargs.get("single_task"):
+                clonespec.config = configspec
+                clonespec.customization = customspec
+                clonespec.powerOn = True
         return configspec, customspec, clonespec
 
-    def make_nic(self, distributed_portgroup):
+    def make_nic(self, distributed_portgroup, portgroup_key=None, switch_uuid=None):
         """  
             Network Interface Card
             :distributed_portgroup vim.DistributedVirtualPortgroup
+            :portgroup_key str (resolved portgroup key, skip the portgroup lookup if set)
+            :switch_uuid str (resolved distributed virtual switch uuid, skip the switch lookup if set)
 
             :return vim.vm.device.VirtualDeviceSpec
         """
-        dvs = distributed_portgroup.config.distributedVirtualSwitch
+        if not portgroup_key or not switch_uuid:
+            portgroup_key = distributed_portgroup.key
+            switch_uuid = distributed_portgroup.config.distributedVirtualSwitch.uuid
+
         dvs_port = vim.dvs.PortConnection(
-            portgroupKey=distributed_portgroup.key,
-            switchUuid=dvs.uuid
+            portgroupKey=portgroup_key,
+            switchUuid=switch_uuid
         )
 
         nic = vim.vm.device.VirtualDeviceSpec()
@@ -550,11 +886,12 @@ class VSphereService(object):
         return self.vm_configspec
 
 
-    def make_vm_relocatespec(self, resource_pool: vim.ResourcePool, datastore: vim.Datastore):
+    def make_vm_relocatespec(self, resource_pool: vim.ResourcePool, datastore: vim.Datastore, linked=False):
         """
             Virtual Machine Relocation Specification
             :datastore vim.Datastore
             :resource_pool vim.ResourcePool
+            :linked bool (create child disks on top of the template snapshot disks)
 
             :return vim.vm.RelocateSpec
         """
@@ -562,6 +899,8 @@ class VSphereService(object):
         self.vm_relocatespec.pool = resource_pool
         if datastore:
             self.vm_relocatespec.datastore = datastore
+        if linked:
+            self.vm_relocatespec.diskMoveType = "createNewChildDiskBacking"
         return self.vm_relocatespec
 
 
@@ -582,10 +921,11 @@ class VSphereService(object):
         return self.vm_customspec
 
 
-    def make_vm_clonespec(self, vm_relocatespec):
+    def make_vm_clonespec(self, vm_relocatespec, snapshot=None):
         """
             Virtual Machine Clone Specification
             :vm_relocatespec vim.RelocateSpec
+            :snapshot vim.vm.Snapshot (the template snapshot for linked clone)
 
             :return vim.vm.CloneSpec
         """
@@ -593,8 +933,260 @@ class VSphereService(object):
         vm_clone_spec.location = vm_relocatespec
         vm_clone_spec.powerOn = False
         vm_clone_spec.template = False
+        if snapshot:
+            vm_clone_spec.snapshot = snapshot
+        return vm_clone_spec
+
+    def make_vm_instantclonespec(self, name, vm_relocatespec, guestinfo=None):
+        """
+            Virtual Machine Instant Clone Specification
+            :name str
+            :vm_relocatespec vim.RelocateSpec
+            :guestinfo dict (guestinfo variables for the guest)
+
+            :return vim.vm.InstantCloneSpec
+        """
+        vm_clone_spec = vim.vm.InstantCloneSpec()
+        vm_clone_spec.name = name
+        vm_clone_spec.location = vm_relocatespec
+        vm_clone_spec.config = [
+            vim.option.OptionValue(key=key, value=value)
+            for key, value in (guestinfo or {}).items()
+        ]
         return vm_clone_spec
 
+    def make_guestinfo(self, hostname, domainname, dhcp=False, *args, **kwargs):
+        """
+            Guestinfo Variables
+            The guest reads the variables with `vmtoolsd --cmd "info-get guestinfo.cerberus.<name>"`
+            :hostname str
+            :domainname str
+            :dhcp bool
+            :kwargs (ipv4_address: str, gateway_address: str, subnet_mask: str, dns_domain: str, dns_server: list)
+
+            :return dict
+        """
+        guestinfo = {
+            "guestinfo.cerberus.hostname": hostname,
+            "guestinfo.cerberus.domain": domainname,
+            "guestinfo.cerberus.dhcp": "true" if dhcp else "false",
+            "guestinfo.cerberus.dns": ",".join(kwargs.get("dns_server") or [])
+        }
+        if not dhcp:
+            guestinfo.update({
+                "guestinfo.cerberus.ipaddress": kwargs.get("ipv4_address"),
+                "guestinfo.cerberus.netmask": kwargs.get("subnet_mask"),
+                "guestinfo.cerberus.gateway": kwargs.get("gateway_address")
+            })
+        return guestinfo
+
+    def wait_for_guests(self, vms, timeout=600, expected=None, excluded=None):
+        """
+            Wait for the guest of the virtual machines to be ready (VMware Tools running
+            and ip address reported). The guest properties of all the virtual machines
+            are watched at once with PropertyCollector updates (WaitForUpdatesEx)
+
+            :param vms: List of virtual machine (vim.VirtualMachine or its managed object id)
+            :param timeout: Maximum time to wait in seconds
+            :param expected: The ip address which the guest should report to be ready,
+                keyed by the virtual machine id (e.g. instant clone still report the source address)
+            :param excluded: List of ip address which the guest should not report to be ready,
+                keyed by the virtual machine id (e.g. the source address of DHCP instant clone)
+            :return: A yield of the virtual machine and its ip address as soon as the guest is ready,
+                the virtual machines which are not ready until the timeout are yielded with None
+            :rtype: Generator
+        """
+        stub = self.service_instance._stub
+        vms = [vim.VirtualMachine(vm, stub) if isinstance(vm, str) else vm for vm in vms]
+        if not vms:
+            return
+
+        pending = dict((vm._moId, vm) for vm in vms)
+        expected = expected or {}
+        excluded = excluded or {}
+        guests = {}
+        deadline = time.time() + timeout
+        updates = tools.wait_for_updates(
+            self.content.propertyCollector,
+            objs=vms,
+            obj_type=vim.VirtualMachine,
+            path_set=self.__class__.GUEST_PROPERTIES,
+            max_wait_seconds=max(1, min(timeout, 30))
+        )
+
+        try:
+            for vm, changes in updates:
+                if vm is not None and vm._moId in pending:
+                    guest = guests.setdefault(vm._moId, {})
+                    guest.update(changes)
+
+                    address = helpers.guest_ready_address(
+                        guest,
+                        expected=expected.get(vm._moId),
+                        excluded=excluded.get(vm._moId)
+                    )
+                    if address:
+                        del pending[vm._moId]
+                        yield vm, address
+
+                if not pending or time.time() >= deadline:
+                    break
+        finally:
+            updates.close()
+
+        for vm in pending.values():
+            yield vm, None
+
+    def describe_vms(self, vms, path_set):
+        """
+            Retrieve the properties of the virtual machines (single call)
+
+            :param vms: List of virtual machine (vim.VirtualMachine or its managed object id)
+            :param path_set: List of virtual machine properties
+            :return: Dictionary of the properties keyed by the virtual machine id
+            :rtype: dict
+        """
+        stub = self.service_instance._stub
+        vms = [vim.VirtualMachine(vm, stub) if isinstance(vm, str) else vm for vm in vms]
+        return tools.retrieve_properties(
+            self.content.propertyCollector,
+            objs=vms,
+            obj_type=vim.VirtualMachine,
+            path_set=path_set
+        )
+
+    def locate_vms(self, vms):
+        """
+            Locate the host and the datastores of the virtual machines (single call)
+
+            :param vms: List of virtual machine (vim.VirtualMachine or its managed object id)
+            :return: Dictionary of the host and datastores (managed object id) keyed by the virtual machine id
+            :rtype: dict
+        """
+        props = self.describe_vms(vms, path_set=["runtime.host", "datastore"])
+
+        locations = {}
+        for key, values in props.items():
+            host = values.get("runtime.host")
+            locations[key] = dict(
+                host=host._moId if host else None,
+                datastores=[datastore._moId for datastore in values.get("datastore") or []]
+            )
+        return locations
+
+    def make_plan(self, template, template_path, network, folder, compute, datastore=None, clone_mode="full"):
+        """
+            Placement Plan
+            Resolve the placement resources of virtual machine creation once,
+            the plan only contains the managed object id, so it could be passed
+            to the pool workers and rebuilt with use_plan() without any inventory lookup
+
+            :param template: VM template name
+            :param template_path: VM template folder
+            :param network: Distributed portgroup name
+            :param folder: Destination folder path (created if not exist)
+            :param compute: Compute resource path (cluster/resource pool)
+            :param datastore: Datastore name
+            :param clone_mode: Clone mode (full, linked or instant)
+            :return: Placement plan
+            :rtype: dict
+        """
+        if clone_mode not in self.__class__.CLONE_MODES:
+            err = ValueError(f"Clone mode [{clone_mode}] are not supported, use one of {self.__class__.CLONE_MODES}")
+            raise err
+
+        template_vm = self.use_template(template_name=template, template_folder=template_path)
+        snapshot = None
+        if clone_mode == "linked":
+            snapshot = self.use_snapshot(template_vm)
+        elif clone_mode == "instant" and template_vm.runtime.powerState != vim.VirtualMachinePowerState.poweredOn:
+            err = errors.UnrecognizedResourceError(f"VM [{template}] should be powered on to be used for instant clone")
+            raise err
+
+        portgroup = self.use_network(network)
+        destination = self.use_folder(folder)
+
+        resource_pool = self.use_compute(compute)
+        storage = self.use_storage(datastore) if datastore else None
+        source = self.locate_vms([template_vm]).get(template_vm._moId, {})
+
+        # Instant clone is forked from the running source, its guest report the source address first
+        source_addresses = []
+        if clone_mode == "instant":
+            guest = self.describe_vms([template_vm], path_set=["guest.ipAddress", "guest.net"]).get(template_vm._moId, {})
+            source_addresses = [
+                address for address in [guest.get("guest.ipAddress")] + (helpers.guest_addresses(guest.get("guest.net")) or [])
+                if address
+            ]
+
+        return {
+            "template": template_vm._moId,
+            "source_host": source.get("host"),
+            "source_addresses": source_addresses,
+            "network": portgroup._moId,
+            "portgroup_key": portgroup.key,
+            "switch_uuid": portgroup.config.distributedVirtualSwitch.uuid,
+            "folder": destination._moId,
+            "compute": resource_pool._moId,
+            "datastore": storage._moId if storage else None,
+            "snapshot": snapshot._moId if snapshot else None,
+            "clone_mode": clone_mode
+        }
+
+    def use_plan(self, plan):
+        """
+            Rebuild the placement resources from the placement plan (make_plan()),
+            the objects are only references, no call are made to vCenter
+
+            :param plan: Placement plan
+            :return: Dictionary of template, network, folder, compute, storage and snapshot object
+            :rtype: dict
+        """
+        stub = self.service_instance._stub
+        return dict(
+            template=vim.VirtualMachine(plan["template"], stub),
+            network=vim.dvs.DistributedVirtualPortgroup(plan["network"], stub),
+            folder=vim.Folder(plan["folder"], stub),
+            compute=vim.ResourcePool(plan["compute"], stub),
+            storage=vim.Datastore(plan["datastore"], stub) if plan.get("datastore") else None,
+            snapshot=vim.vm.Snapshot(plan["snapshot"], stub) if plan.get("snapshot") else None
+        )
+
+    def use_snapshot(self, template, name=None):
+        """
+            Select the template snapshot for linked clone.
+            The managed snapshot (LINKED_CLONE_SNAPSHOT) is used if exist, otherwise
+            the snapshot is taken on the virtual machine. A template could not take a snapshot,
+            so the current snapshot of the template is used instead
+
+            :param template: Template virtual machine (vim.VirtualMachine)
+            :param name: Snapshot name (default: LINKED_CLONE_SNAPSHOT)
+            :return: vim.vm.Snapshot
+        """
+        name = name or self.__class__.LINKED_CLONE_SNAPSHOT
+        info = template.snapshot
+        snapshot = helpers.get_snapshot(info.rootSnapshotList if info else [], name)
+        if snapshot is not None:
+            return snapshot
+
+        if template.config.template:
+            if info and info.currentSnapshot:
+                return info.currentSnapshot
+
+            err = errors.UnrecognizedResourceError(
+                f"VM template [{template.name}] has no snapshot for linked clone, take a snapshot [{name}] before convert it to template"
+            )
+            raise err
+
+        task = template.CreateSnapshot_Task(
+            name=name,
+            description="This snapshot managed by Cerberus Suites for linked clone.",
+            memory=False,
+            quiesce=False
+        )
+        snapshotting = self.__class__.wait_for_task(f"VM Snapshot {template.name}", task)
+        return snapshotting.info.result
+
     def use_template(self, template_uuid=None, template_name=None, template_folder="Template"):
         if template_uuid:
             template_vm = helpers.get_virtual_machine(
@@ -641,38 +1233,46 @@ class VSphereService(object):
         return network
 
     def use_folder(self, folder_path):
-        parts = folder_path.split("/")
-        folder = helpers.get_main_folder(content=self.content, name=parts[0], datacenter=self.datacenter_obj)
+        folder = self.paths.folder(folder_path)
         if folder is None:
-            err = errors.UnrecognizedResourceError(f"Folder [{parts[0]}] are not found")
+            err = errors.UnrecognizedResourceError(f"Folder [{folder_path.split('/')[0]}] are not found")
             raise err
 
-        if len(parts) == 1:
-            return folder
-        else:
-            return self.find_child_folder(child_folder_path="/".join(parts[1:]), parent=folder)
+        return folder
 
     def use_compute(self, compute_name):
-        parts = compute_name.split("/")
-        compute = helpers.get_cluster_compute(
-            content=self.content,
-            name=parts[0],
-            datacenter=self.datacenter_obj
-        )
+        compute = self.paths.compute(compute_name)
         if compute is None:
-            err = errors.UnrecognizedResourceError(f"Compute [{parts[0]}] are not found")
+            err = errors.UnrecognizedResourceError(f"Compute [{compute_name}] are not found")
             raise err
 
-        if len(parts) > 1:
-            for value in parts[1:]:
-                compute = helpers.get_resource_pool(
-                    content=self.content,
-                    parent_rscpool=compute.resourcePool,
-                    name=value
-                )
-            return compute
-        return compute.resourcePool
+        return compute
     
+    def make_placement(self, computes, datastores=None):
+        """
+            Placement Engine
+            Take the capacity snapshot of the candidate computes and datastores
+
+            :param computes: List of compute resource path (cluster/resource pool)
+            :param datastores: List of datastore name
+            :return: PlacementEngine
+        """
+        storages = []
+        for datastore in datastores or []:
+            storage = self.use_storage(datastore)
+            if storage is None:
+                err = errors.UnrecognizedResourceError(f"Datastore [{datastore}] are not found")
+                raise err
+            storages.append(storage)
+
+        engine = PlacementEngine(
+            self.content,
+            pools=[self.use_compute(compute) for compute in computes],
+            datastores=storages
+        )
+        engine.refresh()
+        return engine
+
     def use_storage(self, storage_name):
         storage = helpers.get_datastore(
             content=self.content,
@@ -680,30 +1280,3 @@ class VSphereService(object):
             datacenter=self.datacenter_obj
         )
         return storage
-
-    def find_child_folder(self, child_folder_path, parent):
-        part_child_folder_path = child_folder_path.split("/")
-        child_name = part_child_folder_path[0]
-        if not child_name.strip():
-            return parent
-        else:
-            folder = helpers.get_child_folder(
-                content=self.content, 
-                name=child_name, 
-                parent=parent
-            )
-
-            if folder is None:
-                try:
-                    folder = parent.CreateFolder(child_name)
-                except:
-                    folder = helpers.get_child_folder(
-                        content=self.content, 
-                        name=child_name, 
-                        parent=parent
-                    )
-
-            return self.find_child_folder(
-                child_folder_path="/".join(part_child_folder_path[1:]), 
-                parent=folder
-            )
\ No newline at end of file
@@ -1,5 +1,16 @@
+import weakref
 from pyVmomi import vim
-from . import errors
+from . import (
+    errors,
+    tools
+)
+from .views import ViewManager
+
+# Name index for each session (keyed by the SOAP stub)
+_name_indexes = weakref.WeakKeyDictionary()
+
+# View manager for each session (keyed by the SOAP stub)
+_view_managers = weakref.WeakKeyDictionary()
 
 ## VSphere Helper ##
 
@@ -24,19 +35,62 @@ def get_obj(content, name, vimtype=[], folder=None):
     if folder is None:
         folder = content.rootFolder
 
-    obj = None
-    container = content.viewManager.CreateContainerView(
-        folder, vimtype, True)
-    view = container.view
-    container.Destroy()
-            
-    for v in view:    
-        if v.name == name:
-            obj = v
-            break
+    index, fresh = get_name_index(content, folder, vimtype)
+    obj = index.get(name)
+    if obj is None and not fresh:
+        # The index could be outdated, so rebuild the index once before give up
+        index, fresh = get_name_index(content, folder, vimtype, invalidate=True)
+        obj = index.get(name)
 
     return obj
 
+def get_name_index(content, folder, vimtype, invalidate=False):
+    """  
+        Get the name to managed object index of the folder for the current session.
+        The index will be built with a single PropertyCollector call that
+        only fetch the name of the managed objects.
+
+        :param content: vim.ServiceInstanceContent
+        :param folder: Container object to be indexed
+        :param vimtype: List of managed object type
+        :param invalidate: Rebuild the index
+        :return: Tuple of the index and whether the index is just built
+        :rtype: tuple(dict, bool)
+    """
+    indexes = _name_indexes.setdefault(folder._stub, {})
+    key = (folder._moId, tuple(vimtype))
+
+    index = indexes.get(key)
+    if index is not None and not invalidate:
+        return index, False
+
+    index = indexes[key] = build_name_index(content, folder, vimtype)
+    return index, True
+
+def get_view_manager(content):
+    """  
+        Get the view manager of the session
+        :param content: vim.ServiceInstanceContent
+        :return: ViewManager
+    """
+    stub = content.viewManager._stub
+    manager = _view_managers.get(stub)
+    if manager is None:
+        manager = _view_managers[stub] = ViewManager(content)
+    return manager
+
+def build_name_index(content, folder, vimtype):
+    container = get_view_manager(content).get(folder, vimtype)
+    filter_spec = tools.make_filter_spec(container, vimtype, path_set=["name"])
+    props = content.propertyCollector.RetrieveContents([filter_spec])
+
+    index = {}
+    for obj in props:
+        for prop in obj.propSet:
+            # Keep the first object like a linear search does
+            index.setdefault(prop.val, obj.obj)
+    return index
+
 def get_child_obj(content, parent, name):
     obj = None
     for child in parent.childEntity:
@@ -119,8 +173,81 @@ def get_child_folder(content, name, parent):
         raise errors.UnrecognizedResourceError("Parent folder is not kind of [vim.Folder]")
     return get_child_obj(content=content, parent=parent, name=name)
 
+# Snapshot Section
+def get_snapshot(snapshots, name):
+    """
+        Search the snapshot by name on the snapshot tree
+        :param snapshots: List of vim.vm.SnapshotTree
+        :param name: Snapshot name
+        :return: vim.vm.Snapshot or None
+    """
+    for tree in snapshots or []:
+        if tree.name == name:
+            return tree.snapshot
+        snapshot = get_snapshot(tree.childSnapshotList, name)
+        if snapshot is not None:
+            return snapshot
+    return None
+
+# Guest Section
+def guest_addresses(nics):
+    """
+        Pick the ip addresses of the vmxnet3 network hardware with deviceConfigId 4000
+
+        :param nics: List of vim.vm.GuestInfo.NicInfo
+        :return: List of ip address or None if the network hardware is not connected
+    """
+    for net in nics or []:
+        if net.connected and net.deviceConfigId == 4000:
+            return list(net.ipAddress)
+    return None
+
+def guest_ready_address(guest, expected=None, excluded=None):
+    """
+        Pick the ip address of the guest when the guest is ready (VMware Tools is running)
+
+        :param guest: Guest properties (guest.ipAddress, guest.net, guest.toolsRunningStatus)
+        :param expected: The guest is only ready when it reports this ip address
+        :param excluded: List of ip address which are never picked (e.g. the address of the instant clone source)
+        :return: IP address or None if the guest is not ready
+    """
+    if guest.get("guest.toolsRunningStatus") != "guestToolsRunning":
+        return None
+
+    addresses = [guest.get("guest.ipAddress")] + (guest_addresses(guest.get("guest.net")) or [])
+    if expected:
+        return expected if expected in addresses else None
+
+    excluded = excluded or []
+    return next((address for address in addresses if address and address not in excluded), None)
+
 # Task Section
-def wait_for_task(task, callbacks={}, *args, **kwargs):
+_service_contents = weakref.WeakKeyDictionary()
+
+def get_service_content(obj):
+    """  
+        Get the service content from the session of the managed object
+        :param obj: Managed object
+        :return: vim.ServiceInstanceContent
+    """
+    content = _service_contents.get(obj._stub)
+    if content is None:
+        service_instance = vim.ServiceInstance("ServiceInstance", obj._stub)
+        content = _service_contents[obj._stub] = service_instance.RetrieveContent()
+    return content
+
+def wait_for_tasks(tasks, callbacks={}, *args, raise_on_error=True, **kwargs):
+    """  
+        Wait for many tasks at once.
+        The task state is watched with PropertyCollector updates (WaitForUpdatesEx),
+        so there is no API call while the tasks are not changed.
+
+        :param tasks: List of vSphere/vCenter task object (vim.Task)
+        :param callbacks: Callbacks of the task state (queued, running, success, error)
+        :param raise_on_error: Raise the task error when a task get error
+        :return: A yield of task and its state whenever the task state or progress changed
+        :rtype: Generator
+    """
     def no_op(task, *args, **kwargs):
         pass
     queued_callback = callbacks.get('queued', no_op)
@@ -128,18 +255,46 @@ def wait_for_task(task, callbacks={}, *args, **kwargs):
     success_callback = callbacks.get('success', no_op)
     error_callback = callbacks.get('error', no_op)
 
-    waiting = True
-    while waiting: 
-        state = task.info.state
-        if state == vim.TaskInfo.State.success:
-            success_callback(task, *args, **kwargs)
-            waiting = False
-        elif state == vim.TaskInfo.State.queued:
-            queued_callback(task, *args, **kwargs)
-        elif state == vim.TaskInfo.State.running:
-            running_callback(task, *args, **kwargs)
-        elif state == vim.TaskInfo.State.error:
-            error_callback(task, *args, **kwargs)
-            raise task.info.error
-        
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    pending = set(task._moId for task in tasks)
+    states = {}
+    updates = tools.wait_for_updates(
+        get_service_content(tasks[0]).propertyCollector,
+        objs=tasks,
+        obj_type=vim.Task,
+        path_set=["info.state", "info.progress"]
+    )
+
+    try:
+        for task, changes in updates:
+            if task is None:
+                continue
+
+            state = changes.get("info.state", states.get(task._moId))
+            states[task._moId] = state
+            if state == vim.TaskInfo.State.success:
+                success_callback(task, *args, **kwargs)
+                pending.discard(task._moId)
+            elif state == vim.TaskInfo.State.queued:
+                queued_callback(task, *args, **kwargs)
+            elif state == vim.TaskInfo.State.running:
+                running_callback(task, *args, **kwargs)
+            elif state == vim.TaskInfo.State.error:
+                error_callback(task, *args, **kwargs)
+                pending.discard(task._moId)
+                if raise_on_error:
+                    raise task.info.error
+
+            yield task, state
+
+            if not pending:
+                break
+    finally:
+        updates.close()
+
+def wait_for_task(task, callbacks={}, *args, **kwargs):
+    for task, state in wait_for_tasks([task], callbacks, *args, **kwargs):
         yield task
@@ -0,0 +1,101 @@
+
+class NgramIndex(object):
+    """ N-gram Index Class
+
+    This class index the text by its n-grams, so the substring search
+    only need to verify the candidates which have all the n-grams of the term.
+
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.grams = {}
+        self.texts = {}
+
+    def ngrams(self, text):
+        return set(text[i:i+self.n] for i in range(len(text) - self.n + 1))
+
+    def add(self, key, text):
+        self.texts[key] = text
+        for gram in self.ngrams(text):
+            self.grams.setdefault(gram, set()).add(key)
+
+    def search(self, term):
+        """
+            Search the keys which the text contains the term
+
+            :param term: Substring to be searched
+            :return: Set of the key
+            :rtype: set
+        """
+        if len(term) < self.n:
+            # The term is too short to be indexed, fallback to linear search
+            return set(key for key, text in self.texts.items() if term in text)
+
+        candidates = None
+        for gram in sorted(self.ngrams(term), key=lambda gram: len(self.grams.get(gram, ()))):
+            keys = self.grams.get(gram)
+            if not keys:
+                return set()
+            candidates = set(keys) if candidates is None else candidates & keys
+            if not candidates:
+                return set()
+
+        return set(key for key in candidates if term in self.texts[key])
+
+class VMIndex(object):
+    """ Virtual Machine Index Class
+
+    This class build the secondary indexes over the virtual machine records
+    (the result of VSphereService.lookup_vms()), a hash on ip address
+    and an n-gram index on name and hostname.
+    The search result are same with the filtering_by() function.
+
+    """
+
+    def __init__(self, records):
+        """
+            Constructor
+
+            :param records: List of virtual machine in dictionary format
+        """
+        self.records = list(records)
+        self.by_ipaddr = {}
+        self.by_name = NgramIndex()
+        self.by_hostname = NgramIndex()
+
+        for position, vm in enumerate(self.records):
+            for ipaddr in vm.get("guest.net") or []:
+                self.by_ipaddr.setdefault(ipaddr, []).append(position)
+            self.by_name.add(position, str.lower(vm.get("name") or ""))
+            self.by_hostname.add(position, str.lower(vm.get("guest.hostName") or ""))
+
+    def search(self, name=None, hostname=None, ipaddr=None):
+        """
+            Search virtual machines by name, hostname or ip address
+
+            :param name: Virtual machine name (or list of name)
+            :param hostname: Virtual machine hostname (or list of hostname)
+            :param ipaddr: Virtual machine ip address
+            :return: List of virtual machine in dictionary format
+            :rtype: list
+        """
+        positions = set()
+        if name:
+            positions = self._search_terms(self.by_name, name)
+        elif hostname:
+            positions = self._search_terms(self.by_hostname, hostname)
+        elif ipaddr:
+            positions = set(self.by_ipaddr.get(ipaddr, []))
+
+        return [self.records[position] for position in sorted(positions)]
+
+    @staticmethod
+    def _search_terms(index, terms):
+        if not isinstance(terms, (list, tuple,)):
+            terms = [terms]
+
+        positions = set()
+        for term in terms:
+            positions |= index.search(str.lower(term))
+        return positions
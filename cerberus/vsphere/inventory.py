@@ -0,0 +1,238 @@
+from pyVmomi import vim, vmodl
+from cerberus.utils import storage
+from . import (
+    helpers,
+    tools
+)
+from .index import VMIndex
+from .records import VMRecord
+
+class InventoryCache(object):
+    """ vSphere Inventory Cache Class
+
+    This class keep an on-disk snapshot of virtual machine properties
+    for a datacenter. The snapshot is kept current by a dedicated
+    PropertyCollector filter, so the refresh only fetch the changes
+    since the last version (WaitForUpdatesEx).
+
+    >>  Note: PropertyCollector filter is bound to the vSphere session,
+              whenever the session is not the same with the snapshot,
+              the snapshot will be loaded from scratch.
+    """
+
+    def __init__(self, service_instance, host, datacenter, path_set, cache_dir=None, page_size=1000):
+        """
+            Constructor
+
+            :param service_instance: vim.ServiceInstance
+            :param host: vSphere/vCenter host
+            :param datacenter: Datacenter object (vim.Datacenter)
+            :param path_set: List of virtual machine properties
+            :param cache_dir: Cache directory (default: ~/.cerberus)
+            :param page_size: Maximum number of object updates for each WaitForUpdatesEx call
+        """
+        self.service_instance = service_instance
+        self.datacenter = datacenter
+        self.path_set = list(path_set)
+        self.page_size = page_size
+        self.path = storage.cache_path(
+            "inventory",
+            f"{storage.safe_name(host, datacenter._moId)}.json",
+            cache_dir=cache_dir
+        )
+        self.session = None
+        self.collector = None
+        self.view = None
+        self.version = ""
+        self.records = {}
+        self.loaded = False
+        self._values = None
+        self._index = None
+
+    @property
+    def content(self):
+        return self.service_instance.content
+
+    @property
+    def stub(self):
+        return self.service_instance._stub
+
+    def load(self):
+        """
+            Load the snapshot from cache file
+        """
+        data = storage.read_json(self.path) or {}
+        if data.get("path_set") == self.path_set:
+            self.session = data.get("session")
+            self.collector = data.get("collector")
+            self.view = data.get("view")
+            self.version = data.get("version") or ""
+            self.records = dict(
+                (key, VMRecord.from_dict(record, obj=vim.VirtualMachine(key, self.stub)))
+                for key, record in (data.get("records") or {}).items()
+            )
+        self.loaded = True
+        self.invalidate()
+
+    def save(self):
+        """
+            Save the snapshot to cache file
+        """
+        storage.write_json(self.path, {
+            "path_set": self.path_set,
+            "session": self.session,
+            "collector": self.collector,
+            "view": self.view,
+            "version": self.version,
+            "records": dict((key, record.to_dict()) for key, record in self.records.items())
+        })
+
+    def reset(self, session=None):
+        """
+            Reset the snapshot and create a new PropertyCollector filter
+            for virtual machines in the datacenter
+
+            :param session: Current session key
+            :return: vmodl.query.PropertyCollector
+        """
+        session = session or self.content.sessionManager.currentSession.key
+        if self.session == session:
+            self.destroy()
+
+        view = self.content.viewManager.CreateContainerView(
+            container=self.datacenter.vmFolder,
+            type=[vim.VirtualMachine],
+            recursive=True
+        )
+        collector = self.content.propertyCollector.CreatePropertyCollector()
+        collector.CreateFilter(
+            tools.make_filter_spec(view, vim.VirtualMachine, path_set=self.path_set),
+            partialUpdates=False
+        )
+
+        self.session = session
+        self.collector = collector._moId
+        self.view = view._moId
+        self.version = ""
+        self.records = {}
+        self.invalidate()
+        return collector
+
+    def destroy(self):
+        """
+            Destroy the PropertyCollector and the view of the snapshot (best effort)
+        """
+        try:
+            if self.collector:
+                vmodl.query.PropertyCollector(self.collector, self.stub).DestroyPropertyCollector()
+            if self.view:
+                vim.view.ContainerView(self.view, self.stub).Destroy()
+        except vmodl.MethodFault:
+            pass
+
+    def attach(self):
+        """
+            Attach to the PropertyCollector of the snapshot,
+            if the snapshot came from another session a new one will be created
+
+            :return: vmodl.query.PropertyCollector
+        """
+        session = self.content.sessionManager.currentSession.key
+        if self.collector and self.session == session:
+            return vmodl.query.PropertyCollector(self.collector, self.stub)
+        return self.reset(session=session)
+
+    def refresh(self):
+        """
+            Refresh the snapshot with the changes since the last version
+
+            :return: List of virtual machine record
+            :rtype: list
+        """
+        if not self.loaded:
+            self.load()
+
+        collector = self.attach()
+        options = vmodl.query.PropertyCollector.WaitOptions(
+            maxWaitSeconds=0,
+            maxObjectUpdates=self.page_size
+        )
+
+        while True:
+            try:
+                update = collector.WaitForUpdatesEx(self.version, options)
+            except (vmodl.fault.ManagedObjectNotFound, vmodl.query.InvalidCollectorVersion):
+                collector = self.reset()
+                continue
+
+            if update is None:
+                break
+
+            self.apply(update)
+            self.version = update.version
+            if not update.truncated:
+                break
+
+        self.save()
+        return self.values()
+
+    def apply(self, update):
+        """
+            Apply the update set from WaitForUpdatesEx to the snapshot
+
+            :param update: vmodl.query.PropertyCollector.UpdateSet
+        """
+        self.invalidate()
+        for filter_set in update.filterSet:
+            for obj_update in filter_set.objectSet:
+                key = obj_update.obj._moId
+                if obj_update.kind == "leave":
+                    self.records.pop(key, None)
+                    continue
+
+                changes = {}
+                for change in obj_update.changeSet:
+                    if change.op in ("remove", "indirectRemove"):
+                        changes[change.name] = None
+                    else:
+                        changes[change.name] = normalize(change.name, change.val)
+
+                record = self.records.get(key)
+                if record is None:
+                    self.records[key] = VMRecord.from_dict(changes, obj=obj_update.obj)
+                else:
+                    self.records[key] = VMRecord.from_dict(dict(record.to_dict(), **changes), obj=record.obj)
+
+    def invalidate(self):
+        self._values = None
+        self._index = None
+
+    def values(self):
+        """
+            :return: List of virtual machine record
+            :rtype: list
+        """
+        if self._values is None:
+            self._values = list(self.records.values())
+        return self._values
+
+    @property
+    def index(self):
+        """
+            Secondary indexes of the snapshot, rebuilt only when the snapshot changed
+            :rtype: VMIndex
+        """
+        if self._index is None:
+            self._index = VMIndex(self.values())
+        return self._index
+
+def normalize(name, value):
+    """
+        Convert the property value to JSON serializable value
+    """
+    if name == "guest.net":
+        return helpers.guest_addresses(value)
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
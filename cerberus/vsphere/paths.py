@@ -0,0 +1,158 @@
+import threading
+import collections
+from pyVmomi import vim
+from . import (
+    helpers,
+    tools
+)
+
+class PathCache(object):
+    """ Inventory Path Cache Class
+
+    This class resolve the folder path and the compute path (cluster/resource pool)
+    of a datacenter to the managed object. The folder and resource pool trees are
+    collected with a single PropertyCollector call (name and parent only),
+    and the resolved paths are kept, so the next resolution does not make
+    any call to vCenter.
+
+    >>  Note: The cache is safe to be shared between threads, the resolution and
+              the missing folder creation are serialized. A folder which is created
+              by another process at the same time (DuplicateName) is used as is.
+    """
+
+    TYPES = [vim.Folder, vim.ResourcePool, vim.ClusterComputeResource]
+
+    def __init__(self, content, datacenter):
+        """
+            Constructor
+
+            :param content: vim.ServiceInstanceContent
+            :param datacenter: Datacenter object (vim.Datacenter)
+        """
+        self.content = content
+        self.datacenter = datacenter
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.roots = {}
+        self.names = {}
+        self.children = {}
+        self.paths = {}
+
+    def load(self):
+        """
+            Collect the folder and resource pool trees of the datacenter
+        """
+        self.roots = dict(
+            vm=self.datacenter.vmFolder,
+            host=self.datacenter.hostFolder
+        )
+
+        view = helpers.get_view_manager(self.content).get(self.datacenter, self.__class__.TYPES)
+        filter_spec = tools.make_filter_spec(view, self.__class__.TYPES, path_set=["name", "parent"])
+        props = self.content.propertyCollector.RetrieveContents([filter_spec])
+
+        self.names = {}
+        self.children = {}
+        self.paths = {}
+        for obj in props:
+            values = dict((prop.name, prop.val) for prop in obj.propSet)
+            self._add(obj.obj, values.get("name"), values.get("parent"))
+        self.loaded = True
+
+    def folder(self, path):
+        """
+            Resolve the folder path, the first part of the path is searched
+            on the whole virtual machine folder, the rest are the child folders
+            which will be created if not exist
+
+            :param path: Folder path (e.g. Production/Services/Web)
+            :return: vim.Folder or None if the first folder is not found
+        """
+        return self._resolve("folder", path, self._resolve_folder)
+
+    def compute(self, path):
+        """
+            Resolve the compute path, the first part of the path is the cluster name,
+            the rest are the resource pools under the cluster
+
+            :param path: Compute path (e.g. ClusterComputeResource/ProductionPool/Server)
+            :return: vim.ResourcePool or None if the path is not found
+        """
+        return self._resolve("compute", path, self._resolve_compute)
+
+    def _resolve(self, kind, path, resolver):
+        with self.lock:
+            key = (kind, path)
+            if key in self.paths:
+                return self.paths[key]
+
+            fresh = not self.loaded
+            if fresh:
+                self.load()
+
+            obj = resolver(path)
+            if obj is None and not fresh:
+                # The cache could be outdated, so reload the cache once before give up
+                self.load()
+                obj = resolver(path)
+
+            if obj is not None:
+                self.paths[key] = obj
+            return obj
+
+    def _resolve_folder(self, path):
+        parts = path.split("/")
+        folder = self._find(self.roots["vm"], parts[0], vim.Folder)
+        if folder is None:
+            return None
+
+        for name in parts[1:]:
+            if not name.strip():
+                break
+
+            child = self._find(folder, name, vim.Folder, recursive=False)
+            if child is None:
+                child = self._create_folder(folder, name)
+            folder = child
+        return folder
+
+    def _resolve_compute(self, path):
+        parts = path.split("/")
+        cluster = self._find(self.roots["host"], parts[0], vim.ClusterComputeResource)
+        if cluster is None:
+            return None
+
+        # The root resource pool of the cluster
+        pool = self._find(cluster, None, vim.ResourcePool, recursive=False)
+        for name in parts[1:]:
+            if pool is None:
+                break
+            pool = self._find(pool, name, vim.ResourcePool)
+        return pool
+
+    def _create_folder(self, parent, name):
+        try:
+            folder = parent.CreateFolder(name)
+        except vim.fault.DuplicateName as exc:
+            # Created by another process after the trees are collected
+            folder = exc.object
+        self._add(folder, name, parent)
+        return folder
+
+    def _add(self, obj, name, parent):
+        self.names[obj._moId] = name
+        if parent is not None:
+            self.children.setdefault(parent._moId, []).append(obj)
+
+    def _find(self, root, name, vimtype, recursive=True):
+        """
+            Breadth-first search from the root, so the nearest object is picked
+        """
+        queue = collections.deque(self.children.get(root._moId, []))
+        while queue:
+            obj = queue.popleft()
+            if isinstance(obj, vimtype) and (name is None or self.names.get(obj._moId) == name):
+                return obj
+            if recursive:
+                queue.extend(self.children.get(obj._moId, []))
+        return None
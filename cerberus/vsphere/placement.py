@@ -0,0 +1,214 @@
+import pyVmomi
+from pyVmomi import vim
+
+MB = 1024 * 1024
+
+class PlacementEngine(object):
+    """ Placement Engine Class
+
+    This class rank the candidate resource pools and datastores by their free
+    capacity and spread the virtual machines over the candidates. The capacity of
+    all the candidates are taken with a single PropertyCollector call (resource pool
+    usage, host quickStats and datastore capacity/free space), then the demand of each
+    placed virtual machine is deducted from the snapshot, so the next virtual machine
+    goes to the next best candidate.
+
+    >>  Note: Hosts which are disconnected or in maintenance mode, and datastores which
+              are inaccessible or in maintenance mode are not counted as capacity.
+    """
+
+    POOL_PROPERTIES = [
+        "owner",
+        "runtime.cpu.maxUsage",
+        "runtime.cpu.overallUsage",
+        "runtime.memory.maxUsage",
+        "runtime.memory.overallUsage"
+    ]
+
+    HOST_PROPERTIES = [
+        "runtime.connectionState",
+        "runtime.inMaintenanceMode",
+        "summary.hardware.cpuMhz",
+        "summary.hardware.numCpuCores",
+        "summary.hardware.memorySize",
+        "summary.quickStats.overallCpuUsage",
+        "summary.quickStats.overallMemoryUsage"
+    ]
+
+    DATASTORE_PROPERTIES = [
+        "host",
+        "summary.accessible",
+        "summary.maintenanceMode",
+        "summary.capacity",
+        "summary.freeSpace"
+    ]
+
+    def __init__(self, content, pools, datastores=None):
+        """
+            Constructor
+
+            :param content: vim.ServiceInstanceContent
+            :param pools: List of candidate resource pool (vim.ResourcePool)
+            :param datastores: List of candidate datastore (vim.Datastore)
+        """
+        self.content = content
+        self.pools = list(pools)
+        self.datastores = list(datastores or [])
+        self.compute_stats = {}
+        self.datastore_stats = {}
+
+    def make_filter_spec(self):
+        """
+            Filter specification of the candidates, the resource pool is traversed
+            to its cluster (owner) and the hosts of the cluster
+        """
+        PropertyCollector = pyVmomi.vmodl.query.PropertyCollector
+
+        compute_to_host = PropertyCollector.TraversalSpec(
+            name="computeToHost",
+            type=vim.ComputeResource,
+            path="host",
+            skip=False
+        )
+        pool_to_owner = PropertyCollector.TraversalSpec(
+            name="poolToOwner",
+            type=vim.ResourcePool,
+            path="owner",
+            skip=False,
+            selectSet=[compute_to_host]
+        )
+
+        object_specs = [
+            PropertyCollector.ObjectSpec(obj=pool, skip=False, selectSet=[pool_to_owner])
+            for pool in self.pools
+        ]
+        object_specs.extend(
+            PropertyCollector.ObjectSpec(obj=datastore, skip=False)
+            for datastore in self.datastores
+        )
+
+        return PropertyCollector.FilterSpec(
+            objectSet=object_specs,
+            propSet=[
+                PropertyCollector.PropertySpec(type=vim.ResourcePool, pathSet=self.__class__.POOL_PROPERTIES),
+                PropertyCollector.PropertySpec(type=vim.ComputeResource, pathSet=["host"]),
+                PropertyCollector.PropertySpec(type=vim.HostSystem, pathSet=self.__class__.HOST_PROPERTIES),
+                PropertyCollector.PropertySpec(type=vim.Datastore, pathSet=self.__class__.DATASTORE_PROPERTIES)
+            ]
+        )
+
+    def refresh(self):
+        """
+            Take the capacity snapshot of the candidates
+        """
+        props = self.content.propertyCollector.RetrieveContents([self.make_filter_spec()])
+        values = dict(
+            (obj.obj._moId, dict((prop.name, prop.val) for prop in obj.propSet))
+            for obj in props
+        )
+
+        self.compute_stats = {}
+        for pool in self.pools:
+            pool_values = values.get(pool._moId, {})
+            owner = pool_values.get("owner")
+            hosts = values.get(owner._moId, {}).get("host") or [] if owner else []
+
+            cpu_capacity = memory_capacity = cpu_usage = memory_usage = cores = 0
+            active_hosts = set()
+            for host in hosts:
+                host_values = values.get(host._moId, {})
+                if host_values.get("runtime.connectionState") != "connected" or host_values.get("runtime.inMaintenanceMode"):
+                    continue
+
+                active_hosts.add(host._moId)
+                cores += host_values.get("summary.hardware.numCpuCores") or 0
+                cpu_capacity += (host_values.get("summary.hardware.cpuMhz") or 0) * (host_values.get("summary.hardware.numCpuCores") or 0)
+                memory_capacity += (host_values.get("summary.hardware.memorySize") or 0) // MB
+                cpu_usage += host_values.get("summary.quickStats.overallCpuUsage") or 0
+                memory_usage += host_values.get("summary.quickStats.overallMemoryUsage") or 0
+
+            # The pool could be limited under the cluster capacity
+            cpu_free = cpu_capacity - cpu_usage
+            memory_free = memory_capacity - memory_usage
+            if pool_values.get("runtime.cpu.maxUsage"):
+                cpu_free = min(cpu_free, pool_values["runtime.cpu.maxUsage"] - (pool_values.get("runtime.cpu.overallUsage") or 0))
+            if pool_values.get("runtime.memory.maxUsage"):
+                memory_free = min(memory_free, (pool_values["runtime.memory.maxUsage"] - (pool_values.get("runtime.memory.overallUsage") or 0)) // MB)
+
+            self.compute_stats[pool._moId] = dict(
+                obj=pool,
+                hosts=active_hosts,
+                core_mhz=(cpu_capacity // cores) if cores else 0,
+                cpu_capacity=cpu_capacity,
+                cpu_free=cpu_free,
+                memory_capacity=memory_capacity,
+                memory_free=memory_free
+            )
+
+        self.datastore_stats = {}
+        for datastore in self.datastores:
+            datastore_values = values.get(datastore._moId, {})
+            if not datastore_values.get("summary.accessible") or datastore_values.get("summary.maintenanceMode", "normal") != "normal":
+                continue
+
+            self.datastore_stats[datastore._moId] = dict(
+                obj=datastore,
+                hosts=set(mount.key._moId for mount in datastore_values.get("host") or []),
+                capacity=datastore_values.get("summary.capacity") or 0,
+                free=datastore_values.get("summary.freeSpace") or 0
+            )
+
+    def place(self, num_cpus=1, memory=1024, disk=0):
+        """
+            Place a virtual machine on the best candidate resource pool and datastore,
+            the demand is deducted from the snapshot
+
+            :param num_cpus: Number of CPUs
+            :param memory: Memory size (MB)
+            :param disk: Disk size (bytes)
+            :return: Tuple of resource pool and datastore (None if there is no datastore candidate)
+            :rtype: tuple(vim.ResourcePool, vim.Datastore)
+        """
+        compute = self._best(
+            self.compute_stats.values(),
+            score=lambda stats: min(
+                ratio(stats["cpu_free"] - num_cpus * stats["core_mhz"], stats["cpu_capacity"]),
+                ratio(stats["memory_free"] - memory, stats["memory_capacity"])
+            )
+        )
+        if compute is None:
+            return None, None
+
+        compute["cpu_free"] -= num_cpus * compute["core_mhz"]
+        compute["memory_free"] -= memory
+
+        # Only the datastores which are mounted on the hosts of the resource pool
+        candidates = [
+            stats for stats in self.datastore_stats.values()
+            if not compute["hosts"] or stats["hosts"] & compute["hosts"]
+        ]
+        datastore = self._best(
+            candidates,
+            score=lambda stats: ratio(stats["free"] - disk, stats["capacity"])
+        )
+        if datastore is None:
+            return compute["obj"], None
+
+        datastore["free"] -= disk
+        return compute["obj"], datastore["obj"]
+
+    @staticmethod
+    def _best(candidates, score):
+        best = None
+        best_score = None
+        for candidate in candidates:
+            candidate_score = score(candidate)
+            if best is None or candidate_score > best_score:
+                best, best_score = candidate, candidate_score
+        return best
+
+def ratio(free, capacity):
+    """
+        Free capacity ratio, a saturated candidate has a negative ratio
+    """
+    return float(free) / capacity if capacity else -1.0
@@ -0,0 +1,119 @@
+import sys
+from . import helpers
+
+# The values which mostly repeated on every virtual machine are interned,
+# so all the records share the same string object
+INTERNED_FIELDS = ("guest_full_name", "guest_id", "version", "guest_state", "power_state", "datacenter")
+
+class VMRecord(object):
+    """ Virtual Machine Record Class
+
+    This class is a compact record (using __slots__) for virtual machine properties
+    from VSphereService.lookup_vms(). The record could be accessed like the dictionary
+    with the property path as the key (vm["config.uuid"], vm.get("guest.net")),
+    so it could be used on the same way with the previous dictionary format.
+
+    >>  Note: The record are treated as immutable, so it could be shared between
+              the stages without copying. Use replace() to make a changed record.
+    """
+
+    FIELDS = {
+        "name": "name",
+        "config.uuid": "uuid",
+        "config.hardware.numCPU": "num_cpu",
+        "config.hardware.memoryMB": "memory_mb",
+        "config.guestFullName": "guest_full_name",
+        "config.guestId": "guest_id",
+        "config.version": "version",
+        "guest.net": "addresses",
+        "guest.guestState": "guest_state",
+        "guest.hostName": "hostname",
+        "runtime.powerState": "power_state",
+        "datacenter": "datacenter",
+        "obj": "obj",
+    }
+
+    __slots__ = tuple(FIELDS.values())
+
+    def __init__(self, **kwargs):
+        for attr in self.__class__.__slots__:
+            value = kwargs.get(attr)
+            if attr in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(str(value))
+            elif attr == "addresses" and value is not None:
+                value = tuple(value)
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable, use replace() instead")
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.__class__.FIELDS[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__class__.FIELDS
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name !r}, uuid={self.uuid !r})"
+
+    def __getstate__(self):
+        return dict((attr, getattr(self, attr)) for attr in self.__class__.__slots__)
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            object.__setattr__(self, attr, value)
+
+    def get(self, key, default=None):
+        """
+            Same like dict.get(), unset property will return the default value
+        """
+        value = getattr(self, self.__class__.FIELDS.get(key, ""), None)
+        return default if value is None else value
+
+    def keys(self):
+        return self.__class__.FIELDS.keys()
+
+    def replace(self, **kwargs):
+        state = self.__getstate__()
+        state.update(kwargs)
+        return self.__class__(**state)
+
+    def to_dict(self, include_mors=False):
+        """
+            :return: The record in dictionary format (keyed by the property path)
+            :rtype: dict
+        """
+        dict_ = {}
+        for key, attr in self.__class__.FIELDS.items():
+            if key == "obj" and not include_mors:
+                continue
+            value = getattr(self, attr)
+            dict_[key] = list(value) if isinstance(value, tuple) else value
+        return dict_
+
+    @classmethod
+    def from_dict(cls, dict_, obj=None):
+        """
+            Make a record from the dictionary format (keyed by the property path),
+            the guest.net value is the list of ip address
+        """
+        kwargs = {}
+        for key, attr in cls.FIELDS.items():
+            if key in dict_:
+                kwargs[attr] = dict_[key]
+        if obj is not None:
+            kwargs["obj"] = obj
+        return cls(**kwargs)
+
+    @classmethod
+    def from_properties(cls, properties):
+        """
+            Make a record from the collected properties (tools.collect_properties()),
+            the guest.net value is the list of vim.vm.GuestInfo.NicInfo
+        """
+        properties = dict(properties)
+        properties["guest.net"] = helpers.guest_addresses(properties.get("guest.net"))
+        return cls.from_dict(properties)
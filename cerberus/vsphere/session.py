@@ -0,0 +1,67 @@
+import ssl
+from pyVmomi import vim, vmodl
+from pyVim.connect import SmartStubAdapter
+from cerberus.utils import storage
+
+class SessionStore(object):
+    """ vCenter Session Store Class
+
+    This class save the vCenter session cookie locally (owner-only permission),
+    so the next invocation could reuse the live session instead of login again.
+
+    """
+
+    def __init__(self, host, port=443, user=None, cache_dir=None):
+        """
+            Constructor
+
+            :param host: vSphere/vCenter host
+            :param port: vSphere/vCenter Server port number
+            :param user: User credential of the session
+            :param cache_dir: Cache directory (default: ~/.cerberus)
+        """
+        self.host = host
+        self.port = port
+        self.path = storage.cache_path(
+            "sessions",
+            f"{storage.safe_name(user, host, port)}.json",
+            cache_dir=cache_dir
+        )
+
+    def load(self, ssl_verify=False):
+        """
+            Load the saved session, the session are checked to vCenter
+            whether the session is still active
+
+            :param ssl_verify: Verify the SSL certificate
+            :return: Tuple of vim.ServiceInstance and its content, or (None, None) if there is no live session
+            :rtype: tuple
+        """
+        data = storage.read_json(self.path)
+        if not data or not data.get("cookie"):
+            return None, None
+
+        context = None if ssl_verify else ssl._create_unverified_context()
+        try:
+            stub = SmartStubAdapter(host=self.host, port=self.port, sslContext=context)
+            stub.cookie = data["cookie"]
+            service_instance = vim.ServiceInstance("ServiceInstance", stub)
+            content = service_instance.RetrieveContent()
+
+            # The current session is unset whenever the session is expired or logged out
+            if content.sessionManager.currentSession is None:
+                raise vim.fault.NotAuthenticated()
+        except (vmodl.MethodFault, OSError):
+            self.clear()
+            return None, None
+
+        return service_instance, content
+
+    def save(self, service_instance):
+        """
+            Save the session cookie of the service instance
+        """
+        storage.write_json(self.path, {"cookie": service_instance._stub.cookie})
+
+    def clear(self):
+        storage.remove(self.path)
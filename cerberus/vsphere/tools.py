@@ -22,6 +22,152 @@ def collect_properties(service_instance, view_ref, obj_type, path_set=None,
         A list of properties for the managed objects
     """
     collector = service_instance.content.propertyCollector
+    filter_spec = make_filter_spec(view_ref, obj_type, path_set=path_set)
+
+    # Retrieve properties
+    props = collector.RetrieveContents([filter_spec])
+
+    data = []
+    for obj in props:
+        data.append(_to_dict(obj, include_mors=include_mors))
+    return data
+
+
+def iter_properties(service_instance, view_ref, obj_type, path_set=None,
+                    include_mors=False, page_size=1000):
+    """
+    Collect properties for managed objects from a view ref page by page
+    The properties are retrieved with RetrievePropertiesEx and
+    ContinueRetrievePropertiesEx, so the caller could process the first
+    page while the next pages are not retrieved yet.
+    Args:
+        si          (ServiceInstance): ServiceInstance connection
+        view_ref (pyVmomi.vim.view.*): Starting point of inventory navigation
+        obj_type      (pyVmomi.vim.*): Type of managed object
+        path_set               (list): List of properties to retrieve
+        include_mors           (bool): If True include the managed objects
+                                       refs in the result
+        page_size               (int): Maximum number of objects for each page
+    Yields:
+        The properties of each managed object
+    """
+    collector = service_instance.content.propertyCollector
+    filter_spec = make_filter_spec(view_ref, obj_type, path_set=path_set)
+    options = pyVmomi.vmodl.query.PropertyCollector.RetrieveOptions()
+    options.maxObjects = page_size
+
+    result = collector.RetrievePropertiesEx([filter_spec], options)
+    token = None
+    try:
+        while result:
+            token = result.token
+            for obj in result.objects:
+                yield _to_dict(obj, include_mors=include_mors)
+
+            if not token:
+                break
+            result = collector.ContinueRetrievePropertiesEx(token)
+            token = None
+    finally:
+        # Release the server-side result when the generator is not exhausted
+        if token:
+            collector.CancelRetrievePropertiesEx(token)
+
+
+def wait_for_updates(collector, objs, obj_type, path_set, max_wait_seconds=60):
+    """
+    Watch properties of the managed objects with WaitForUpdatesEx
+    A dedicated PropertyCollector is created for the watcher, so the other
+    watchers on the same session are not affected. The PropertyCollector
+    is destroyed when the generator is closed.
+    Args:
+        collector (PropertyCollector): Session PropertyCollector
+        objs                   (list): List of managed object to be watched
+        obj_type      (pyVmomi.vim.*): Type of managed object
+        path_set               (list): List of properties to watch
+        max_wait_seconds        (int): Maximum time for each WaitForUpdatesEx call
+    Yields:
+        A tuple of the managed object and the changed properties,
+        or (None, {}) whenever max_wait_seconds reached without any changes
+    """
+    collector = collector.CreatePropertyCollector()
+    try:
+        filter_spec = pyVmomi.vmodl.query.PropertyCollector.FilterSpec()
+        filter_spec.objectSet = [
+            pyVmomi.vmodl.query.PropertyCollector.ObjectSpec(obj=obj, skip=False)
+            for obj in objs
+        ]
+        filter_spec.propSet = [
+            pyVmomi.vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=path_set)
+        ]
+        collector.CreateFilter(filter_spec, partialUpdates=False)
+
+        options = pyVmomi.vmodl.query.PropertyCollector.WaitOptions()
+        options.maxWaitSeconds = max_wait_seconds
+        version = ""
+        while True:
+            update = collector.WaitForUpdatesEx(version, options)
+            if update is None:
+                yield None, {}
+                continue
+
+            version = update.version
+            for filter_set in update.filterSet:
+                for obj_update in filter_set.objectSet:
+                    changes = {}
+                    for change in obj_update.changeSet:
+                        changes[change.name] = change.val
+                    yield obj_update.obj, changes
+    finally:
+        collector.DestroyPropertyCollector()
+
+
+def retrieve_properties(collector, objs, obj_type, path_set):
+    """
+    Retrieve properties of the managed objects with a single RetrieveContents call
+    Args:
+        collector (PropertyCollector): Session PropertyCollector
+        objs                   (list): List of managed object
+        obj_type      (pyVmomi.vim.*): Type of managed object
+        path_set               (list): List of properties to retrieve
+    Returns:
+        A dictionary of the properties keyed by the managed object id
+    """
+    if not objs:
+        return {}
+
+    filter_spec = pyVmomi.vmodl.query.PropertyCollector.FilterSpec()
+    filter_spec.objectSet = [
+        pyVmomi.vmodl.query.PropertyCollector.ObjectSpec(obj=obj, skip=False)
+        for obj in objs
+    ]
+    filter_spec.propSet = [
+        pyVmomi.vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=path_set)
+    ]
+    props = collector.RetrieveContents([filter_spec])
+    return dict((obj.obj._moId, _to_dict(obj)) for obj in props)
+
+
+def _to_dict(obj, include_mors=False):
+    properties = {}
+    for prop in obj.propSet:
+        properties[prop.name] = prop.val
+
+    if include_mors:
+        properties['obj'] = obj.obj
+    return properties
+
+
+def make_filter_spec(view_ref, obj_type, path_set=None):
+    """
+    Build a property filter specification for managed objects from a view ref
+    Args:
+        view_ref (pyVmomi.vim.view.*): Starting point of inventory navigation
+        obj_type      (pyVmomi.vim.*): Type (or list of types) of managed object
+        path_set               (list): List of properties to retrieve
+    Returns:
+        A PropertyCollector.FilterSpec
+    """
 
     # Create object specification to define the starting point of
     # inventory navigation
@@ -38,34 +184,23 @@ def collect_properties(service_instance, view_ref, obj_type, path_set=None,
     obj_spec.selectSet = [traversal_spec]
 
     # Identify the properties to the retrieved
-    property_spec = pyVmomi.vmodl.query.PropertyCollector.PropertySpec()
-    property_spec.type = obj_type
+    property_specs = []
+    for type_ in (obj_type if isinstance(obj_type, (list, tuple)) else [obj_type]):
+        property_spec = pyVmomi.vmodl.query.PropertyCollector.PropertySpec()
+        property_spec.type = type_
 
-    if not path_set:
-        property_spec.all = True
+        if not path_set:
+            property_spec.all = True
 
-    property_spec.pathSet = path_set
+        property_spec.pathSet = path_set
+        property_specs.append(property_spec)
 
     # Add the object and property specification to the
     # property filter specification
     filter_spec = pyVmomi.vmodl.query.PropertyCollector.FilterSpec()
     filter_spec.objectSet = [obj_spec]
-    filter_spec.propSet = [property_spec]
-
-    # Retrieve properties
-    props = collector.RetrieveContents([filter_spec])
-
-    data = []
-    for obj in props:
-        properties = {}
-        for prop in obj.propSet:
-            properties[prop.name] = prop.val
-
-        if include_mors:
-            properties['obj'] = obj.obj
-
-        data.append(properties)
-    return data
+    filter_spec.propSet = property_specs
+    return filter_spec
 
 
 def get_container_view(service_instance, obj_type, container=None):
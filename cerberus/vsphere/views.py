@@ -0,0 +1,56 @@
+import threading
+from pyVmomi import vmodl
+
+class ViewManager(object):
+    """ Container View Manager Class
+
+    This class keep one recursive ContainerView for each (container, type) pair
+    of the session, so the lookups reuse the view instead of creating a new view
+    (and leaving it on vCenter) for every call. The view is kept up to date
+    by vCenter, so it is safe to be reused as long as the session is alive.
+
+    >>  Note: The views have to be destroyed (destroy()) before the session is left,
+              unless the session is logged out.
+    """
+
+    def __init__(self, content):
+        """
+            Constructor
+
+            :param content: vim.ServiceInstanceContent
+        """
+        self.content = content
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def get(self, container, vimtype):
+        """
+            Get the view of the container for the managed object types
+
+            :param container: Container object (vim.Folder, vim.Datacenter, etc)
+            :param vimtype: List of managed object type
+            :return: vim.view.ContainerView
+        """
+        key = (container._moId, tuple(vimtype))
+        with self.lock:
+            view = self.views.get(key)
+            if view is None:
+                view = self.views[key] = self.content.viewManager.CreateContainerView(
+                    container=container,
+                    type=list(vimtype),
+                    recursive=True
+                )
+            return view
+
+    def destroy(self):
+        """
+            Destroy all the views (best effort)
+        """
+        with self.lock:
+            views, self.views = list(self.views.values()), {}
+
+        for view in views:
+            try:
+                view.Destroy()
+            except vmodl.MethodFault:
+                pass
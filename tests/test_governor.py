@@ -0,0 +1,97 @@
+import threading
+import collections
+from cerberus.scripts.commands.vm.governor import Governor
+
+class FakeResult(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def get(self):
+        self.done.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+class FakePool(object):
+    """
+        Same like multiprocessing.Pool.apply_async(), the work is done on a thread
+        and the in-flight works of each target are recorded when the work is dispatched
+    """
+
+    def __init__(self, governor):
+        self.governor = governor
+        self.peaks = collections.Counter()
+        self.peak_running = 0
+
+    def apply_async(self, func, args, callback=None, error_callback=None):
+        for target, count in self.governor.inflight.items():
+            self.peaks[target] = max(self.peaks[target], count)
+        self.peak_running = max(self.peak_running, self.governor.running)
+
+        result = FakeResult()
+
+        def run():
+            try:
+                result.value = func(*args)
+            except Exception as exc:
+                result.error = exc
+                error_callback(exc)
+            else:
+                callback(result.value)
+            result.done.set()
+
+        threading.Timer(0.01, run).start()
+        return result
+
+def double(item):
+    if item < 0:
+        raise ValueError(item)
+    return item * 2
+
+def test_map_limits():
+    governor = Governor(paralel=4, host=2, datastore=1)
+    pool = FakePool(governor)
+    targets = [
+        [("host", f"host-{index % 2}"), ("datastore", f"datastore-{index % 3}")]
+        for index in range(9)
+    ]
+
+    assert governor.map(pool, double, list(range(9)), targets) == [index * 2 for index in range(9)]
+    assert pool.peak_running <= 4
+    assert all(count <= 2 for target, count in pool.peaks.items() if target[0] == "host")
+    assert all(count <= 1 for target, count in pool.peaks.items() if target[0] == "datastore")
+
+def test_map_unlimited_target():
+    governor = Governor(paralel=2, host=0)
+    pool = FakePool(governor)
+
+    assert governor.map(pool, double, [1, 2, 3], [[("host", "host-1")]] * 3) == [2, 4, 6]
+    assert governor.limits == {}
+    assert pool.peak_running <= 2
+
+def test_map_release_on_error():
+    governor = Governor(paralel=2, datastore=1)
+    pool = FakePool(governor)
+    targets = [[("datastore", "datastore-1")]] * 3
+
+    results = governor.map(pool, double, [1, -1, 3], targets)
+
+    assert results[0] == 2 and results[2] == 6
+    assert isinstance(results[1], ValueError)
+    assert governor.running == 0
+    assert not +governor.inflight
+
+def test_batches_reset_per_batch():
+    governor = Governor(paralel=3, datastore=2)
+    targets = [[("datastore", "datastore-1"), ("host", "")]] * 5
+
+    batches = []
+    for batch in governor.batches(list(range(5)), targets):
+        batches.append(batch)
+        assert governor.running == 0
+        assert not +governor.inflight
+
+    assert batches == [[0, 1], [2, 3], [4]]
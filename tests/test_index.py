@@ -0,0 +1,67 @@
+from cerberus.vsphere.core import filtering_by
+from cerberus.vsphere.index import NgramIndex, VMIndex
+
+VMS = [
+    {"name": "Web-Prod-01", "guest.hostName": "web-prod-01", "guest.net": ["10.0.0.11"]},
+    {"name": "web-prod-02", "guest.hostName": "WEB-PROD-02", "guest.net": ["10.0.0.12", "10.0.1.12"]},
+    {"name": "DB-Prod-01", "guest.hostName": "db-prod-01", "guest.net": ["10.0.0.21"]},
+    {"name": "cache-01", "guest.hostName": None, "guest.net": []},
+    {"name": None, "guest.hostName": "orphan", "guest.net": None},
+]
+
+def names(vms):
+    return [vm.get("name") for vm in vms]
+
+def test_ngram_substring_search():
+    index = NgramIndex()
+    index.add(1, "web-prod-01")
+    index.add(2, "db-prod-01")
+    index.add(3, "web-staging-01")
+
+    assert index.search("prod") == {1, 2}
+    assert index.search("web-") == {1, 3}
+    assert index.search("prod-02") == set()
+    assert index.search("missing") == set()
+
+def test_ngram_short_term_fallback():
+    index = NgramIndex()
+    index.add(1, "web-prod-01")
+    index.add(2, "db-prod-01")
+
+    assert index.search("db") == {2}
+    assert index.search("0") == {1, 2}
+    assert index.search("x") == set()
+
+def test_vmindex_search_by_name_and_hostname():
+    index = VMIndex(VMS)
+
+    assert names(index.search(name="PROD")) == ["Web-Prod-01", "web-prod-02", "DB-Prod-01"]
+    assert names(index.search(hostname="prod-02")) == ["web-prod-02"]
+    assert names(index.search(name="ca")) == ["cache-01"]
+
+def test_vmindex_search_list_terms():
+    index = VMIndex(VMS)
+
+    assert names(index.search(name=["DB", "Cache"])) == ["DB-Prod-01", "cache-01"]
+    assert names(index.search(hostname=["WEB-PROD-01", "orphan"])) == ["Web-Prod-01", None]
+
+def test_vmindex_search_ipaddr():
+    index = VMIndex(VMS)
+
+    assert names(index.search(ipaddr="10.0.1.12")) == ["web-prod-02"]
+    assert index.search(ipaddr="10.0.0.1") == []
+
+def test_vmindex_same_with_filtering_by():
+    index = VMIndex(VMS)
+    queries = [
+        dict(name="prod"),
+        dict(name="PROD-0"),
+        dict(name=["Web", "DB-PROD"]),
+        dict(name=["cAcHe", "nothing"]),
+        dict(hostname="Web"),
+        dict(hostname=["ORPHAN", "db-PROD"]),
+        dict(ipaddr="10.0.0.21"),
+    ]
+
+    for query in queries:
+        assert index.search(**query) == list(filter(filtering_by(**query), VMS)), query
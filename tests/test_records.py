@@ -0,0 +1,73 @@
+import pickle
+import pytest
+from pyVmomi import vim
+from cerberus.vsphere.records import VMRecord
+
+PROPERTIES = {
+    "name": "web-prod-01",
+    "config.uuid": "4210b7f4-3bd1-7a3e-1c4b-2f3c7e8d9a01",
+    "config.hardware.numCPU": 2,
+    "config.hardware.memoryMB": 4096,
+    "config.guestFullName": "CentOS 7 (64-bit)",
+    "config.guestId": "centos7_64Guest",
+    "config.version": "vmx-13",
+    "guest.net": [
+        vim.vm.GuestInfo.NicInfo(connected=False, deviceConfigId=4001, ipAddress=["192.168.0.10"]),
+        vim.vm.GuestInfo.NicInfo(connected=True, deviceConfigId=4000, ipAddress=["10.0.0.11", "fe80::1"]),
+    ],
+    "guest.guestState": "running",
+    "guest.hostName": "web-prod-01.production.local",
+    "runtime.powerState": "poweredOn",
+}
+
+def test_from_properties():
+    record = VMRecord.from_properties(PROPERTIES)
+
+    assert record["name"] == "web-prod-01"
+    assert record["config.hardware.numCPU"] == 2
+    assert record["guest.net"] == ("10.0.0.11", "fe80::1")
+    assert record.get("datacenter") is None
+    assert record.get("datacenter", "-") == "-"
+    assert "guest.hostName" in record
+    with pytest.raises(KeyError):
+        record["unknown"]
+
+def test_dict_round_trip():
+    record = VMRecord.from_properties(PROPERTIES)
+    dict_ = record.to_dict()
+
+    assert "obj" not in dict_
+    assert dict_["guest.net"] == ["10.0.0.11", "fe80::1"]
+    assert VMRecord.from_dict(dict_).to_dict() == dict_
+
+def test_dict_round_trip_with_mors():
+    obj = vim.VirtualMachine("vm-42")
+    record = VMRecord.from_dict(dict(PROPERTIES, **{"guest.net": ["10.0.0.11"]}), obj=obj)
+
+    assert record.to_dict(include_mors=True)["obj"] is obj
+    assert VMRecord.from_dict(record.to_dict(), obj=obj)["obj"] is obj
+
+def test_immutable_and_replace():
+    record = VMRecord.from_properties(PROPERTIES)
+    with pytest.raises(AttributeError):
+        record.name = "other"
+
+    replaced = record.replace(datacenter="production")
+    assert replaced["datacenter"] == "production"
+    assert record["datacenter"] is None
+    assert dict(replaced.to_dict(), datacenter=None) == record.to_dict()
+
+def test_interned_fields_are_shared():
+    first = VMRecord.from_dict({"runtime.powerState": "".join(["powered", "On"])})
+    second = VMRecord.from_dict({"runtime.powerState": "".join(["powered", "On"])})
+
+    assert first["runtime.powerState"] is second["runtime.powerState"]
+
+def test_pickle_round_trip():
+    record = VMRecord.from_properties(PROPERTIES).replace(datacenter="production")
+    restored = pickle.loads(pickle.dumps(record))
+
+    assert isinstance(restored, VMRecord)
+    assert restored.to_dict() == record.to_dict()
+    with pytest.raises(AttributeError):
+        restored.name = "other"
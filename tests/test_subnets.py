@@ -0,0 +1,71 @@
+import os
+import stat
+from cerberus.phpipam.subnets import SubnetCache
+
+RECORDS = [
+    {"id": "1", "subnet": "10.0.0.0", "mask": "8", "description": "Production"},
+    {"id": "2", "subnet": "10.10.0.0", "mask": "16", "description": "Production DC1"},
+    {"id": "3", "subnet": "10.10.20.0", "mask": "24", "description": "Production DC1 Web"},
+    {"id": "4", "subnet": "192.168.0.0", "mask": "24", "description": "Staging"},
+    {"id": "5", "subnet": "2001:db8::", "mask": "64", "description": "IPv6"},
+    {"id": "6", "subnet": None, "mask": None, "description": "Folder"},
+]
+
+def make_cache(tmp_path, ttl=300):
+    return SubnetCache("https://ipam.local", "cerberus", ttl=ttl, cache_dir=str(tmp_path))
+
+def test_get(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.update(RECORDS)
+
+    assert cache.get(subnet_id=3)["subnet"] == "10.10.20.0"
+    assert cache.get(cidr="10.10.0.0/16")["id"] == "2"
+    assert cache.get(cidr="10.10.20.7/24")["id"] == "3"
+    assert cache.get(cidr="2001:db8::/64")["id"] == "5"
+    assert cache.get(cidr="10.10.30.0/24") is None
+    assert cache.get(cidr="invalid") is None
+    assert cache.get(subnet_id=6) is None
+
+def test_get_returns_copy(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.update(RECORDS)
+
+    cache.get(subnet_id=3)["description"] = "Changed"
+    assert cache.get(cidr="10.10.20.0/24")["description"] == "Production DC1 Web"
+
+def test_ttl(tmp_path):
+    cache = make_cache(tmp_path, ttl=300)
+    assert cache.expired
+
+    cache.update(RECORDS)
+    assert not cache.expired
+
+    cache.fetched -= 301
+    assert cache.expired
+
+    cache.postpone()
+    assert not cache.expired
+    assert cache.get(subnet_id=3)["subnet"] == "10.10.20.0"
+
+def test_save_load(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.update(RECORDS)
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+
+    other = make_cache(tmp_path)
+    assert not other.loaded
+    other.load()
+
+    assert other.loaded
+    assert other.fetched == cache.fetched
+    assert not other.expired
+    assert other.get(cidr="192.168.0.0/24")["id"] == "4"
+    assert other.get(subnet_id=3)["subnet"] == "10.10.20.0"
+
+    cache.clear()
+    assert cache.get(subnet_id=3) is None
+
+    other = make_cache(tmp_path)
+    other.load()
+    assert other.expired
+    assert other.get(subnet_id=3) is None
@@ -0,0 +1,48 @@
+import os
+import stat
+import time
+import datetime
+from cerberus.phpipam import errors
+from cerberus.phpipam.core import token_rejected
+from cerberus.phpipam.tokens import TokenStore, parse_expires, DEFAULT_LIFETIME
+
+def local_time(seconds):
+    return datetime.datetime.fromtimestamp(time.time() + seconds).strftime("%Y-%m-%d %H:%M:%S")
+
+def test_save_load(tmp_path):
+    store = TokenStore("https://ipam.local", "cerberus", user="admin", cache_dir=str(tmp_path))
+    store.save("abc123", local_time(3600))
+
+    assert store.load() == "abc123"
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+
+    other = TokenStore("https://ipam.local", "cerberus", user="admin", cache_dir=str(tmp_path))
+    assert other.load() == "abc123"
+
+    store.clear()
+    assert store.load() is None
+
+def test_load_within_margin(tmp_path):
+    store = TokenStore("https://ipam.local", "cerberus", cache_dir=str(tmp_path), margin=300)
+    store.save("abc123", local_time(120))
+
+    assert store.load() is None
+
+    store.margin = 60
+    assert store.load() == "abc123"
+
+def test_parse_expires():
+    expires = local_time(7200)
+    assert abs(parse_expires(expires) - (time.time() + 7200)) < 2
+
+def test_parse_expires_fallback():
+    # Unknown, invalid or already passed (different timezone) expiry use the default lifetime
+    for expires in (None, "12/06/2019 10:02", local_time(-7200)):
+        assert abs(parse_expires(expires) - (time.time() + DEFAULT_LIFETIME)) < 2
+
+def test_token_rejected():
+    assert token_rejected(errors.HttpError("Unauthorized", status_code=401))
+    assert token_rejected(errors.HttpError("Forbidden", status_code=403, reason="Token expired"))
+    assert not token_rejected(errors.HttpError("Forbidden", status_code=403, reason="Permission denied"))
+    assert not token_rejected(errors.HttpError("Forbidden", status_code=403))
+    assert not token_rejected(errors.HttpError("Bad Request", status_code=400, reason="Invalid token"))